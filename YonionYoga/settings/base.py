@@ -110,6 +110,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+        'OPTIONS': {
+            'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+        },
+        'KEY_PREFIX': 'YonionYoga',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -175,6 +190,97 @@ WAGTAIL_SITE_NAME = "YonionYoga"
 # e.g. in notification emails. Don't include '/admin' or a trailing slash
 BASE_URL = 'http://example.com'
 
+# Site search runs on a local inverted index (search/backend.py) with Chinese
+# bigram tokenization; rebuild it with `manage.py update_index` (or
+# `update_index --chunked` to rebuild in place, resumable with --resume).
+# Publish, unpublish and delete only queue the change: run
+# `manage.py process_index_queue --watch` next to the web workers.
+WAGTAILSEARCH_BACKENDS = {
+    'default': {
+        'BACKEND': 'search.backend',
+        'PATH': os.path.join(BASE_DIR, 'search_index.sqlite3'),
+        'AUTO_UPDATE': False,
+    },
+}
+
+
+# YonionYoga settings
+
+# Wallpaper tag used when a page's own wallpaper tag has no image yet
+YONION_WALLPAPER_FALLBACK_TAG = '默认壁纸'
+YONION_WALLPAPER_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Rendered home page sections are rebuilt on change; the timeout only bounds
+# how long an orphaned fragment stays in the cache
+YONION_HOME_FRAGMENT_TIMEOUT = 7 * 24 * 60 * 60
+
+# Listing totals and page boundaries are dropped when a page of the listed type
+# changes; the timeout bounds their drift otherwise
+YONION_LISTING_COUNT_TIMEOUT = 10 * 60
+
+# Facet counts are rebuilt on publish; the cached copy only expires as a safety net
+YONION_FACET_CACHE_TIMEOUT = 24 * 60 * 60
+
+# "猜你喜欢" picks courses of this category, ranked by tags shared with the
+# pages being viewed; recommendations are recomputed on publish
+YONION_RECOMMENDATION_CATEGORY = 'workshop'
+YONION_RECOMMENDATION_COUNT = 6
+YONION_RECOMMENDATION_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Search hits are counted in memory and written to the popular-query tables
+# in batches, at most this many queries or seconds apart
+YONION_SEARCH_HIT_FLUSH_SIZE = 100
+YONION_SEARCH_HIT_FLUSH_INTERVAL = 60
+
+# Search result ids are cached per normalised query until the indexing queue
+# applies a change; SIZE bounds the in-process LRU tier
+YONION_SEARCH_CACHE_SIZE = 256
+YONION_SEARCH_CACHE_TIMEOUT = 60 * 60
+
+# The indexing queue is applied this many queued changes per batch; the
+# watching worker polls every INTERVAL seconds when the queue is empty
+YONION_SEARCH_INDEX_BATCH_SIZE = 100
+YONION_SEARCH_INDEX_INTERVAL = 5
+# A queued object failing this many runs in a row is set aside (IndexQueueEntry.failed)
+YONION_SEARCH_INDEX_MAX_ATTEMPTS = 5
+
+# Partner studios verify certificates through /api/certs/verify/ (one pair)
+# and /api/certs/verify/batch/ (NDJSON, at most this many pairs per request)
+YONION_CERT_VERIFY_BATCH_SIZE = 500
+
+# Unknown certificate numbers are rejected by an in-memory Bloom filter
+# before the database; this is the share of unknown numbers that still
+# get looked up (`manage.py cert_filter_report` shows the measured rate)
+YONION_CERT_FILTER_ERROR_RATE = 0.001
+# New numbers reach every worker through a journal in the cache; the filter
+# is rebuilt from the table on deletes and at least this many seconds apart
+YONION_CERT_FILTER_REFRESH_INTERVAL = 6 * 60 * 60
+
+# Certificate queries (query page POSTs and the API) are rate limited with
+# counters in the shared cache: (requests, per this many seconds) per client
+# IP and for all clients together. Pairs sent to the batch API count one
+# each, in a bucket of their own with the hourly rate of single queries. Behind a proxy, set the header carrying
+# the client address: 'HTTP_X_REAL_IP' as set by nginx, or
+# 'HTTP_X_FORWARDED_FOR' with PROXY_COUNT the number of our own proxies
+# appending to it (the entries before theirs come from the client).
+YONION_CERT_RATE_LIMIT = {
+    'ip': (30, 60),
+    'batch': (1800, 60 * 60),
+    'global': (200, 1),
+}
+YONION_RATE_LIMIT_IP_HEADER = None
+YONION_RATE_LIMIT_PROXY_COUNT = 1
+
+# Printable certificates are drawn with Pillow once per certificate version
+# and stored under MEDIA_ROOT/certs/. The font needs Chinese glyphs (Debian
+# package fonts-noto-cjk; INDEX 2 is the simplified Chinese face of the
+# collection); TEMPLATE is an optional background image (drawn at A4
+# landscape, 1754x1240).
+YONION_CERT_FONT = '/usr/share/fonts/opentype/noto/NotoSerifCJK-Regular.ttc'
+YONION_CERT_FONT_INDEX = 2
+YONION_CERT_TEMPLATE = None
+YONION_CERT_FILE_MAX_AGE = 365 * 24 * 60 * 60
+
 
 
 LOGGING = {
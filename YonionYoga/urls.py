@@ -15,6 +15,9 @@ urlpatterns = [
     url(r'^documents/', include(wagtaildocs_urls)),
 
     url(r'^search/$', search_views.search, name='search'),
+    url(r'^search/suggest/$', search_views.suggest, name='search_suggest'),
+
+    url(r'^api/certs/', include('certificate.urls')),
 
     # For anything not caught by a more specific rule above, hand over to
     # Wagtail's page serving mechanism. This should be the last pattern in
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "YonionYoga.settings.dev")
 
 application = get_wsgi_application()
+
+# Build the search suggestions and the certificate number filter before
+# the first request needs them
+from certificate.bloom import cert_filter  # noqa: E402
+from search.suggest import suggest_index  # noqa: E402
+
+cert_filter.warm()
+suggest_index.warm()
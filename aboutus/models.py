@@ -13,6 +13,9 @@ from wagtail.admin.edit_handlers import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.images.edit_handlers import ImageChooserPanel
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.images.models import Image
+from home.gallery import first_gallery_item
+from home.listing import paginate_listing
+from home.wallpapers import get_wallpaper
 from wagtail.search import index
 
 # Create your models here.
@@ -31,7 +34,7 @@ class AboutusIndexPage(Page):
     def get_context(self, request):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
-        wallpaper = Image.objects.filter(tags__name="资讯壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("资讯壁纸")
 
         # make the variable 'resources' available on the template
         context['wallpaper'] = wallpaper
@@ -50,9 +53,9 @@ class ClassRoomPage(Page):
         verbose_name_plural = verbose_name
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="学习环境壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("学习环境壁纸")
 
-        items = self.classroom_images.all()
+        items = self.classroom_images.select_related('image')
         paginator = Paginator(items, 6) # Show 6 resources per page
         page = request.GET.get('page')
         try:
@@ -112,7 +115,7 @@ class MilestonePage(Page):
         verbose_name_plural = verbose_name
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="发展历程壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("发展历程壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
@@ -141,7 +144,7 @@ class AboutusPage(Page):
         verbose_name_plural = verbose_name
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="关于我们壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("关于我们壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
@@ -162,18 +165,9 @@ class ContactusIndexPage(Page):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
 
-        wallpaper = Image.objects.filter(tags__name="联系我们壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("联系我们壁纸")
         contactuspages = ContactusPage.objects.all().order_by('-first_published_at')
-        paginator = Paginator(contactuspages, 6) # Show 6 resources per page
-        page = request.GET.get('page')
-        try:
-            contactuspages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            contactuspages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            contactuspages = paginator.page(paginator.num_pages)
+        contactuspages = paginate_listing(request, contactuspages, 6) # Show 6 resources per page
 
         # make the variable 'resources' available on the template
         context['wallpaper'] = wallpaper
@@ -216,14 +210,14 @@ class ContactusPage(Page):
     ]
 
     def thumbnail_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
             return None
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="联系我们壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("联系我们壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
@@ -261,18 +255,9 @@ class CobranchIndexPage(Page):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
 
-        wallpaper = Image.objects.filter(tags__name="合作机构壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("合作机构壁纸")
         cobranchpages = CobranchPage.objects.all().order_by('-first_published_at')
-        paginator = Paginator(cobranchpages, 6) # Show 6 resources per page
-        page = request.GET.get('page')
-        try:
-            cobranchpages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            cobranchpages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            cobranchpages = paginator.page(paginator.num_pages)
+        cobranchpages = paginate_listing(request, cobranchpages, 6) # Show 6 resources per page
 
         # make the variable 'resources' available on the template
         context['wallpaper'] = wallpaper
@@ -315,14 +300,14 @@ class CobranchPage(Page):
     ]
 
     def thumbnail_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
             return None
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="合作机构壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("合作机构壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 21:00
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, Q
+from django.utils.functional import cached_property
+
+# Changelist counts stop at this many rows; unfiltered lists of larger
+# tables show the database's row estimate instead
+COUNT_LIMIT = 10000
+
+# Holder name matches per search word; the list goes into an IN (...)
+NAME_MATCH_LIMIT = 500
+
+
+def _normalize(text):
+    return ''.join(text.split()).lower()
+
+
+def name_grams(name):
+    # Every character and every pair of adjacent characters
+    name = _normalize(name)
+    return set(name) | {name[i:i + 2] for i in range(len(name) - 1)}
+
+
+def index_cert_names(rows):
+    """
+    (Re)build the name grams of the given (cert pk, user_name) rows.
+    """
+    from certificate.models import CertNameGram
+
+    rows = list(rows)
+    CertNameGram.objects.filter(cert__in=[pk for pk, user_name in rows]).delete()
+    CertNameGram.objects.bulk_create(
+        [CertNameGram(cert_id=pk, gram=gram) for pk, user_name in rows for gram in name_grams(user_name)])
+
+
+def _name_matches(term, queryset):
+    """
+    Primary keys of (at most NAME_MATCH_LIMIT) certificates of `queryset`
+    whose holder name contains `term`, and whether there were more: the
+    candidates having all of its character pairs (or its single character)
+    come from the (gram, cert) index, then the name itself is checked since
+    the pairs need not be adjacent.
+    """
+    from certificate.models import CertNameGram
+
+    normalized = _normalize(term)
+    grams = {normalized[i:i + 2] for i in range(len(normalized) - 1)} or {normalized}
+    candidates = (CertNameGram.objects
+                  .filter(gram__in=grams)
+                  .values('cert')
+                  .annotate(found=Count('gram', distinct=True))
+                  .filter(found=len(grams))
+                  .values('cert'))
+    pks = list(queryset
+               .filter(pk__in=candidates, user_name__icontains=term)
+               .order_by()
+               .values_list('pk', flat=True)[:NAME_MATCH_LIMIT + 1])
+    return pks[:NAME_MATCH_LIMIT], len(pks) > NAME_MATCH_LIMIT
+
+
+def search_certs(queryset, search_term):
+    """
+    Admin search without `LIKE '%q%'` scans: each word matches certificate
+    numbers, ID numbers and programs by prefix, or holder names through the
+    name gram index. The holder matches are resolved first, so every
+    branch of the OR is a range read on an index. Words are combined with
+    AND, like the default admin search.
+
+    Return the filtered queryset and the words whose holder matches were
+    cut at NAME_MATCH_LIMIT. The holder matches of a word are taken among
+    the results of the words applied before it, and a word with too many
+    (a common surname) is applied after the others.
+    """
+    pending, deferred, truncated = search_term.split(), set(), []
+    while pending:
+        term = pending.pop(0)
+        pks, more = _name_matches(term, queryset)
+        if more and pending and term not in deferred:
+            deferred.add(term)
+            pending.append(term)
+            continue
+        if more:
+            truncated.append(term)
+        queryset = queryset.filter(
+            Q(cert_id__startswith=term) |
+            Q(user_id__startswith=term) |
+            Q(program__startswith=term) |
+            Q(pk__in=pks))
+    return queryset, truncated
+
+
+def estimated_row_count(model):
+    """
+    The database's own row estimate for the table of `model` (table
+    statistics, no scan), or None where there is none.
+    """
+    connection = connections[model.objects.db]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute('SELECT TABLE_ROWS FROM information_schema.TABLES '
+                           'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s', [table])
+        elif connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] is not None else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Changelist paginator that never counts a large table: unfiltered lists
+    use the table statistics once they are past COUNT_LIMIT rows, filtered
+    ones are counted up to COUNT_LIMIT (a LIMITed subquery).
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_row_count(queryset.model)
+            if estimate is not None and estimate > COUNT_LIMIT:
+                return estimate
+        return queryset.order_by()[:COUNT_LIMIT].count()
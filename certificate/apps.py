@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CertificateConfig(AppConfig):
     name = 'certificate'
+
+    def ready(self):
+        from certificate import checks, signals  # noqa: F401
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 19:30
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from home.generations import append_journal, bump_generation, get_generations, read_journal
+
+
+def _cert_key(cert_id):
+    # Case-insensitive like MySQL's cert_id lookups
+    return cert_id.strip().lower()
+
+
+class BloomFilter(object):
+    """
+    Bit array with `hashes` positions per key, derived from one md5 digest
+    by double hashing. Never answers "no" for a key that was added; a "yes"
+    may be a false positive.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity = max(capacity, 1)
+        self.bits = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.bits / capacity * math.log(2))), 1)
+        self.count = 0
+        self._array = bytearray((self.bits + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.md5(key.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._array[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def size(self):
+        # Bytes used by the bit array
+        return len(self._array)
+
+    def false_positive_rate(self):
+        # Expected rate for the keys added so far
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+
+def build_filter():
+    """
+    A BloomFilter of every certificate number, read from the Cert table.
+    """
+    from certificate.models import Cert
+
+    cert_ids = Cert.objects.values_list('cert_id', flat=True)
+    # Room for certificates added before the next rebuild
+    bloom = BloomFilter(int(cert_ids.count() * 1.25) + 1000, settings.YONION_CERT_FILTER_ERROR_RATE)
+    for cert_id in cert_ids.iterator():
+        bloom.add(_cert_key(cert_id))
+    return bloom
+
+
+class CertFilter(object):
+    """
+    Per-process Bloom filter over every `Cert.cert_id`, so that a query for
+    a certificate number that does not exist (typically a bot enumerating
+    ids) is answered without a database round trip.
+
+    Built at startup (see `warm`). New numbers are not a reason to rebuild:
+    `publish_cert_ids` appends them to a journal in the shared cache and
+    every process adds the entries written since its last lookup. The
+    filter is rebuilt from the Cert table when the 'certs' generation moved
+    (deletes: a Bloom filter cannot remove keys), when it is older than
+    YONION_CERT_FILTER_REFRESH_INTERVAL or when it holds more numbers than
+    it was sized for. Rebuilds run in the background; lookups keep using the
+    old filter meanwhile, which at worst lets a deleted number through to
+    the database. When journal entries were lost, every lookup goes to the
+    database until the rebuild is done.
+    """
+
+    # A process further behind than this many journal entries rebuilds
+    MAX_CATCH_UP = 1000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._generation = None
+        self._journal = None
+        self._built_at = 0
+        self._filter = None
+        # Numbers published since the filter was built were lost
+        self._incomplete = False
+
+    def _build(self, generation, journal):
+        # `journal` is read before the table: numbers published later are
+        # caught up
+        bloom = build_filter()
+        with self._lock:
+            self._filter, self._generation, self._journal, self._built_at = bloom, generation, journal, time.time()
+            self._incomplete = False
+
+    def _rebuild_in_background(self, generation, journal):
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+
+        def rebuild():
+            try:
+                self._build(generation, journal)
+            finally:
+                self._rebuilding = False
+                connection.close()
+
+        threading.Thread(target=rebuild, name='cert-filter', daemon=True).start()
+
+    def _stale(self, generation, journal):
+        return (generation != self._generation or
+                time.time() - self._built_at > settings.YONION_CERT_FILTER_REFRESH_INTERVAL or
+                self._filter.count > self._filter.capacity)
+
+    def _catch_up(self, generation, journal):
+        cert_ids = None
+        if 0 <= journal - self._journal <= self.MAX_CATCH_UP:
+            cert_ids = read_journal('certs-added', self._journal, journal)
+        if cert_ids is None:
+            # Too far behind or entries lost: not answered from the filter
+            # until it is rebuilt
+            self._incomplete = True
+            self._rebuild_in_background(generation, journal)
+        else:
+            for cert_id in cert_ids:
+                self._filter.add(_cert_key(cert_id))
+        self._journal = journal
+
+    def get_filter(self):
+        generation, journal = get_generations('certs', 'certs-added')
+        if self._filter is None:
+            # Not built yet (or being built by `warm`): wait for it
+            with self._build_lock:
+                if self._filter is None:
+                    self._build(generation, journal)
+        elif self._stale(generation, journal):
+            self._rebuild_in_background(generation, journal)
+        if journal != self._journal:
+            with self._lock:
+                if journal != self._journal:
+                    self._catch_up(generation, journal)
+        return None if self._incomplete else self._filter
+
+    def warm(self):
+        """
+        Build the filter in the background, so that the first certificate
+        query does not wait for it. Called by the WSGI application.
+        """
+        def build():
+            try:
+                self.get_filter()
+            finally:
+                connection.close()
+
+        threading.Thread(target=build, name='cert-filter', daemon=True).start()
+
+    def might_exist(self, cert_id):
+        """
+        False when no certificate has this number; True when one may have.
+        """
+        bloom = self.get_filter()
+        return bloom is None or _cert_key(cert_id) in bloom
+
+    def add(self, cert_id):
+        bloom = self._filter
+        if bloom is not None:
+            bloom.add(_cert_key(cert_id))
+
+
+cert_filter = CertFilter()
+
+
+def publish_cert_ids(cert_ids):
+    """
+    Tell every process about newly saved certificate numbers. Call once they
+    are committed: a process building its filter afterwards must find them
+    in the table.
+    """
+    cert_ids = list(cert_ids)
+    if cert_ids:
+        # Processes built longer ago than this rebuild anyway
+        append_journal('certs-added', cert_ids, settings.YONION_CERT_FILTER_REFRESH_INTERVAL)
+
+
+def invalidate_cert_filter():
+    # Every process rebuilds its filter after its next lookup
+    bump_generation('certs')
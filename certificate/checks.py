@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 22:30
+
+import os
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+@register()
+def check_cert_font(app_configs, **kwargs):
+    # Printable certificates cannot be drawn without it
+    if os.path.exists(settings.YONION_CERT_FONT):
+        return []
+    return [Warning(
+        'YONION_CERT_FONT {!r} does not exist: certificate downloads will fail.'.format(settings.YONION_CERT_FONT),
+        hint='Install fonts-noto-cjk or set YONION_CERT_FONT to a font with Chinese glyphs.',
+        id='certificate.W001',
+    )]
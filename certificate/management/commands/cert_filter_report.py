@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 19:30
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from certificate.bloom import build_filter
+
+
+class Command(BaseCommand):
+    help = "Build the certificate number filter and report its size and false-positive rate"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--probes', type=int, default=100000,
+            help='Random unknown numbers looked up to measure the false-positive rate')
+
+    def handle(self, *args, **options):
+        started = time.time()
+        bloom = build_filter()
+        built = time.time() - started
+
+        probes = options['probes']
+        started = time.time()
+        # Random numbers that cannot be real certificates: every hit is a false positive
+        hits = sum(1 for i in range(probes) if 'probe-{}'.format(uuid.uuid4().hex) in bloom)
+        looked_up = time.time() - started
+
+        self.stdout.write('Certificates:         {}'.format(bloom.count))
+        self.stdout.write('Filter size:          {} bytes ({} bits, {} hashes)'.format(bloom.size, bloom.bits, bloom.hashes))
+        self.stdout.write('Build time:           {:.3f}s'.format(built))
+        self.stdout.write('Expected FP rate:     {:.4%}'.format(bloom.false_positive_rate()))
+        if probes:
+            self.stdout.write('Measured FP rate:     {:.4%} ({} of {} probes, {:.1f}us per lookup)'.format(
+                hits / probes, hits, probes, looked_up / probes * 1e6))
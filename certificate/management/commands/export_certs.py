@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 21:30
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from certificate.models import Cert
+from certificate.spreadsheets import export_chunks, file_format
+
+
+def _date_option(options, name):
+    value = options[name]
+    if not value:
+        return None
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise CommandError('--{} must be a valid YYYY-MM-DD date, not {!r}'.format(name.replace('_', '-'), value))
+    return date
+
+
+class Command(BaseCommand):
+    help = 'Export certificates to a CSV or XLSX file, streamed in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output .csv or .xlsx file')
+        parser.add_argument('--program', default=None, help='Only certificates of this program')
+        parser.add_argument('--issued-from', default=None, help='Only certificates issued on or after YYYY-MM-DD')
+        parser.add_argument('--issued-to', default=None, help='Only certificates issued on or before YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        try:
+            extension = file_format(options['path'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        issued_from = _date_option(options, 'issued_from')
+        issued_to = _date_option(options, 'issued_to')
+
+        queryset = Cert.objects.all()
+        if options['program']:
+            queryset = queryset.filter(program=options['program'])
+        if issued_from:
+            queryset = queryset.filter(issue_date__gte=issued_from)
+        if issued_to:
+            queryset = queryset.filter(issue_date__lte=issued_to)
+
+        started = time.time()
+        size = 0
+        with open(options['path'], 'wb') as f:
+            for chunk in export_chunks(queryset, extension):
+                f.write(chunk)
+                size += len(chunk)
+        self.stdout.write('Wrote {} ({} bytes) in {:.1f}s'.format(options['path'], size, time.time() - started))
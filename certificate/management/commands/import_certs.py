@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 19:00
+
+import csv
+import datetime
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+
+from certificate.admin_search import index_cert_names
+from certificate.bloom import publish_cert_ids
+from certificate.models import Cert
+from certificate.spreadsheets import read_cert_rows
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Existing ids are looked up this many rows at a time (two IN lists per
+# query stay under SQLite's 999 parameter limit)
+LOOKUP_CHUNK_SIZE = 450
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # Spreadsheets store numeric ids as floats
+        value = int(value)
+    return str(value).strip()
+
+
+def _date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = _text(value).replace('/', '-').replace('.', '-')
+    if not text:
+        return None
+    try:
+        date = parse_date(text)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ValidationError({'issue_date': '{!r} 不是有效日期'.format(text)})
+    return date
+
+
+class Command(BaseCommand):
+    help = (
+        'Import certificates from a CSV or XLSX file, streamed in batches. Rows '
+        'whose cert_id or user_id already exists are skipped and reported. '
+        'Progress is saved after every batch; rerun with --resume after a failure.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file, header row with field names or their Chinese labels')
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Rows validated and inserted per transaction')
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Skip the rows already imported by an earlier, interrupted run')
+        parser.add_argument(
+            '--state', default=None,
+            help='Progress file (default: <path>.progress)')
+        parser.add_argument(
+            '--errors', default=None,
+            help='Write the rejected rows with the reason to this CSV file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError('No such file: {}'.format(path))
+        state_path = options['state'] or path + '.progress'
+        batch_size = options['batch_size']
+
+        done = 0
+        if options['resume'] and os.path.exists(state_path):
+            with open(state_path) as f:
+                done = json.load(f)['row']
+            self.stdout.write('Resuming after row {}'.format(done))
+
+        self.errors = None
+        errors_file = open(options['errors'], 'w', newline='', encoding='utf-8-sig') if options['errors'] else None
+        if errors_file:
+            self.errors = csv.writer(errors_file)
+            self.errors.writerow(['row', 'cert_id', 'user_id', 'error'])
+
+        self.started = time.time()
+        self.read = self.imported = self.rejected = 0
+        batch = []
+        try:
+            for number, values in read_cert_rows(path):
+                if number <= done:
+                    continue
+                batch.append((number, values))
+                if len(batch) >= batch_size:
+                    self.import_batch(batch, state_path)
+                    batch = []
+            if batch:
+                self.import_batch(batch, state_path)
+        except ValueError as e:
+            raise CommandError(str(e))
+        finally:
+            if errors_file:
+                errors_file.close()
+
+        elapsed = time.time() - self.started
+        self.stdout.write(self.style.SUCCESS('Imported {} of {} rows ({} rejected) in {:.1f}s, {:.0f} rows/s'.format(
+            self.imported, self.read, self.rejected, elapsed, self.read / elapsed if elapsed else 0)))
+        if os.path.exists(state_path):
+            os.remove(state_path)
+
+    def reject(self, number, values, reason):
+        self.rejected += 1
+        if self.errors:
+            self.errors.writerow([number, _text(values.get('cert_id')), _text(values.get('user_id')), reason])
+        else:
+            self.stderr.write('Row {}: {}'.format(number, reason))
+
+    def clean_batch(self, batch):
+        """
+        Validate one batch without per-row queries: field checks on unsaved
+        instances, then a query per LOOKUP_CHUNK_SIZE rows for the cert_id /
+        user_id values of the batch that already exist, checked with set lookups together with the
+        values seen earlier in the batch. Earlier batches are in the database
+        by now, so duplicates across the whole file are caught with memory
+        bounded by the batch size. Ids within a batch compare
+        case-insensitively, like MySQL's unique indexes.
+        """
+        certs = []
+        for number, values in batch:
+            cert = Cert(
+                cert_id=_text(values.get('cert_id')),
+                user_name=_text(values.get('user_name')),
+                user_id=_text(values.get('user_id')),
+                program=_text(values.get('program')),
+            )
+            try:
+                issue_date = _date(values.get('issue_date'))
+                if issue_date:
+                    cert.issue_date = issue_date
+                cert.clean_fields(exclude=['created'])
+            except ValidationError as e:
+                messages = ['{}: {}'.format(Cert._meta.get_field(name).verbose_name, message)
+                            for name, field_messages in e.message_dict.items() for message in field_messages]
+                self.reject(number, values, '; '.join(messages))
+                continue
+            certs.append((number, values, cert))
+
+        cert_ids, user_ids = set(), set()
+        for i in range(0, len(certs), LOOKUP_CHUNK_SIZE):
+            chunk = [cert for number, values, cert in certs[i:i + LOOKUP_CHUNK_SIZE]]
+            existing = Cert.objects.filter(Q(cert_id__in=[cert.cert_id for cert in chunk]) |
+                                           Q(user_id__in=[cert.user_id for cert in chunk]))
+            for cert_id, user_id in existing.values_list('cert_id', 'user_id'):
+                cert_ids.add(cert_id.lower())
+                user_ids.add(user_id.lower())
+
+        valid = []
+        for number, values, cert in certs:
+            if cert.cert_id.lower() in cert_ids:
+                self.reject(number, values, '证书编号 {} 已存在'.format(cert.cert_id))
+            elif cert.user_id.lower() in user_ids:
+                self.reject(number, values, '身份证 {} 已有证书'.format(cert.user_id))
+            else:
+                cert_ids.add(cert.cert_id.lower())
+                user_ids.add(cert.user_id.lower())
+                valid.append(cert)
+        return valid
+
+    def index_names(self, certs):
+        # bulk_create sends no post_save (and sets no pk on MySQL): read the
+        # new rows back for the admin's name index
+        for i in range(0, len(certs), LOOKUP_CHUNK_SIZE):
+            cert_ids = [cert.cert_id for cert in certs[i:i + LOOKUP_CHUNK_SIZE]]
+            index_cert_names(Cert.objects.filter(cert_id__in=cert_ids).values_list('pk', 'user_name'))
+
+    def import_batch(self, batch, state_path):
+        first, last = batch[0][0], batch[-1][0]
+        try:
+            with transaction.atomic():
+                certs = self.clean_batch(batch)
+                Cert.objects.bulk_create(certs)
+                self.index_names(certs)
+        except DatabaseError as e:
+            raise CommandError('Rows {}-{} failed: {}. Rows up to {} are imported; '
+                               'rerun with --resume to continue.'.format(first, last, e, first - 1))
+
+        # No post_save either for the cert filters: tell them directly
+        publish_cert_ids(cert.cert_id for cert in certs)
+
+        # Saved only once the batch is committed
+        with open(state_path, 'w') as f:
+            json.dump({'row': last}, f)
+
+        self.read += len(batch)
+        self.imported += len(certs)
+        elapsed = time.time() - self.started
+        self.stdout.write('Rows {}-{}: {} imported, {} total, {:.0f} rows/s'.format(
+            first, last, len(certs), self.imported, self.read / elapsed if elapsed else 0))
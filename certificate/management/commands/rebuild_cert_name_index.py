@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 21:00
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from certificate.admin_search import index_cert_names
+from certificate.models import Cert, CertNameGram
+
+CHUNK_SIZE = 450
+
+
+class Command(BaseCommand):
+    help = "Rebuild the holder name index used by the certificate admin search (migrations fill it; this repairs it)"
+
+    def handle(self, *args, **options):
+        CertNameGram.objects.all().delete()
+        count, last = 0, 0
+        while True:
+            rows = list(Cert.objects.filter(pk__gt=last).order_by('pk').values_list('pk', 'user_name')[:CHUNK_SIZE])
+            if not rows:
+                break
+            with transaction.atomic():
+                index_cert_names(rows)
+            count += len(rows)
+            last = rows[-1][0]
+        self.stdout.write('Indexed the names of {} certificates ({} grams)'.format(count, CertNameGram.objects.count()))
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.1 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificate', '0009_auto_20190530_1308'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertRevocation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cert_id', models.CharField(db_index=True, max_length=32, verbose_name='证书编号')),
+                ('user_name', models.CharField(max_length=32, verbose_name='证书持有人姓名')),
+                ('issue_date', models.DateField(verbose_name='证书签署时间')),
+                ('reason', models.CharField(blank=True, max_length=128, verbose_name='撤销原因')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='撤销时间')),
+            ],
+            options={
+                'verbose_name': '证书撤销记录',
+                'verbose_name_plural': '证书撤销记录',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.1 on 2026-10-18 21:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificate', '0010_certrevocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertNameGram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=2, verbose_name='字词')),
+            ],
+            options={
+                'verbose_name': '证书姓名索引',
+                'verbose_name_plural': '证书姓名索引',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cert',
+            index=models.Index(fields=['issue_date'], name='certificate_issue_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cert',
+            index=models.Index(fields=['program'], name='certificate_program_idx'),
+        ),
+        migrations.AddField(
+            model_name='certnamegram',
+            name='cert',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='certificate.Cert', verbose_name='证书'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='certnamegram',
+            unique_together={('gram', 'cert')},
+        ),
+    ]
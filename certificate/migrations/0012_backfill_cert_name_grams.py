@@ -0,0 +1,34 @@
+# Generated by Django 2.2.1 on 2026-10-18 23:40
+
+from django.db import migrations
+
+from certificate.admin_search import name_grams
+
+CHUNK_SIZE = 450
+
+
+def index_cert_names(apps, schema_editor):
+    # The admin name search reads this index: fill it for the existing
+    # certificates (new ones are indexed on save)
+    Cert = apps.get_model('certificate', 'Cert')
+    CertNameGram = apps.get_model('certificate', 'CertNameGram')
+    CertNameGram.objects.all().delete()
+    last = 0
+    while True:
+        rows = list(Cert.objects.filter(pk__gt=last).order_by('pk').values_list('pk', 'user_name')[:CHUNK_SIZE])
+        if not rows:
+            break
+        CertNameGram.objects.bulk_create(
+            [CertNameGram(cert_id=pk, gram=gram) for pk, user_name in rows for gram in name_grams(user_name)])
+        last = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificate', '0011_cert_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_cert_names, migrations.RunPython.noop),
+    ]
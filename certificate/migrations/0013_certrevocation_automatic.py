@@ -0,0 +1,25 @@
+# Generated by Django 2.2.1 on 2026-10-18 23:55
+
+from django.db import migrations, models
+
+
+def mark_automatic(apps, schema_editor):
+    # The rows the certificate signals wrote so far
+    CertRevocation = apps.get_model('certificate', 'CertRevocation')
+    CertRevocation.objects.filter(reason__in=['证书信息已修改', '证书已删除']).update(automatic=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('certificate', '0012_backfill_cert_name_grams'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certrevocation',
+            name='automatic',
+            field=models.BooleanField(default=False, editable=False, verbose_name='自动撤销'),
+        ),
+        migrations.RunPython(mark_automatic, migrations.RunPython.noop),
+    ]
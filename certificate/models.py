@@ -17,9 +17,15 @@ from wagtail.images.blocks import ImageChooserBlock
 from wagtail.documents.models import Document
 from wagtail.documents.edit_handlers import DocumentChooserPanel
 from wagtail.images.models import Image
+from home.gallery import first_gallery_item
+from home.recommendations import get_recommendations
+from home.wallpapers import get_wallpaper
 from wagtail.search import index
 from course.models import CoursePage
+from certificate.bloom import cert_filter
 from certificate.forms import CertQueryForm
+from certificate.ratelimit import check_rate_limit, too_many_requests
+from certificate.tokens import download_url, qr_code_svg, verification_url
 import pysnooper
 
 # Create your models here.
@@ -49,6 +55,53 @@ class Cert(models.Model):
         db_table = 'Certificate'
         verbose_name = '瑜伽教练证书'
         verbose_name_plural = verbose_name
+        # Admin ordering and prefix search (see certificate.admin_search)
+        indexes = [
+            models.Index(fields=['issue_date'], name='certificate_issue_date_idx'),
+            models.Index(fields=['program'], name='certificate_program_idx'),
+        ]
+
+    def __str__(self):
+        return '姓名:[{}], 证书编号:[{}]'.format(self.user_name, self.cert_id)
+
+
+class CertNameGram(models.Model):
+    """
+    Characters and character pairs of each holder name, so the admin can
+    find "%小明%" through an index instead of scanning every certificate.
+    Maintained by certificate.admin_search.
+    """
+    cert = models.ForeignKey(Cert, verbose_name='证书', on_delete=models.CASCADE, related_name='+')
+    gram = models.CharField(verbose_name='字词', max_length=2)
+
+    class Meta:
+        unique_together = ('gram', 'cert')
+        verbose_name = '证书姓名索引'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return '{}:{}'.format(self.gram, self.cert_id)
+
+
+class CertRevocation(models.Model):
+    """
+    Certificate data whose signed verification tokens (certificate.tokens)
+    are no longer valid. Written when a certificate is deleted or its
+    number, holder name or issue date changes; staff can add rows to
+    revoke a certificate that still exists.
+    """
+    cert_id = models.CharField(verbose_name='证书编号', max_length=32, db_index=True)
+    user_name = models.CharField(verbose_name='证书持有人姓名', max_length=32)
+    issue_date = models.DateField(verbose_name='证书签署时间')
+    reason = models.CharField(verbose_name='撤销原因', max_length=128, blank=True)
+    # Written by certificate.signals, which may delete it again; rows added
+    # by staff are never removed automatically
+    automatic = models.BooleanField(verbose_name='自动撤销', default=False, editable=False)
+    created = models.DateTimeField(verbose_name='撤销时间', auto_now_add=True)
+
+    class Meta:
+        verbose_name = '证书撤销记录'
+        verbose_name_plural = verbose_name
 
     def __str__(self):
         return '姓名:[{}], 证书编号:[{}]'.format(self.user_name, self.cert_id)
@@ -63,16 +116,22 @@ class CertQueryPage(Page):
         verbose_name_plural = verbose_name
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="证书壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("证书壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
         return context
 
     def serve(self, request):
+        # Queries are rate limited before anything is rendered or looked up
+        if request.method == 'POST':
+            retry_after = check_rate_limit(request)
+            if retry_after:
+                return too_many_requests(retry_after)
+
         # Context
-        wallpaper = Image.objects.filter(tags__name="证书壁纸").order_by('-created_at')[0]
-        umaylike = CoursePage.objects.filter(category='workshop')[:6]
+        wallpaper = get_wallpaper("证书壁纸")
+        umaylike = get_recommendations()
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
         context['umaylike'] = umaylike
@@ -83,12 +142,19 @@ class CertQueryPage(Page):
             if form.is_valid():
                 cd = form.cleaned_data
                 try:
+                    if not cert_filter.might_exist(cd['cert_id']):
+                        # Definitely an unknown number: answer without the database
+                        raise Cert.DoesNotExist
                     my_cert = Cert.objects.get(cert_id=cd['cert_id'])
                     if my_cert.user_name != cd['user_name']:
                         context['err_info'] = '编号[{}]的证书持有者姓名与[{}]不符'.format(cd['cert_id'], cd['user_name'])
                         return render(request, 'certificate/cert_query_err.html', context)
 
                     context['cert'] = my_cert
+                    context['verify_url'] = verification_url(request, my_cert)
+                    context['verify_qr'] = qr_code_svg(context['verify_url'])
+                    context['image_url'] = download_url(my_cert, 'png')
+                    context['pdf_url'] = download_url(my_cert, 'pdf')
                     return render(request, 'certificate/cert_detail.html', context)
 
                 except Cert.DoesNotExist:
@@ -118,7 +184,7 @@ class CertHelpPage(Page):
         verbose_name_plural = verbose_name
 
     def thumbnail_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
@@ -145,7 +211,7 @@ class CertHelpPage(Page):
     ]
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="证书壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("证书壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
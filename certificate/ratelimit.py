@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 19:50
+
+import json
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+# Bodies of the 429 answers, built once: a rejected request renders nothing
+TOO_MANY_REQUESTS_HTML = (
+    '<!DOCTYPE html><html><head><meta charset="utf-8"><title>请求过于频繁</title></head>'
+    '<body><p>证书查询过于频繁，请稍后再试。</p></body></html>'
+).encode('utf-8')
+TOO_MANY_REQUESTS_JSON = json.dumps({'error': 'too many requests'}).encode('utf-8')
+
+
+def client_ip(request):
+    """
+    Address of the client as seen by the outermost trusted proxy. Clients
+    can send any X-Forwarded-For they like and each proxy appends the
+    address it got the request from, so only the entry appended by our own
+    proxies counts: the YONION_RATE_LIMIT_PROXY_COUNT-th from the end.
+    """
+    header = settings.YONION_RATE_LIMIT_IP_HEADER
+    if header and request.META.get(header):
+        addresses = [address.strip() for address in request.META[header].split(',')]
+        return addresses[-min(settings.YONION_RATE_LIMIT_PROXY_COUNT, len(addresses))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _window_key(key, window):
+    return '{}:{}'.format(key, window)
+
+
+def _take(key, capacity, period, cost, now):
+    """
+    Count `cost` requests against a bucket of `capacity` requests per
+    `period` seconds. Returns 0 when they fit, or the seconds to wait.
+
+    Requests are counted per window of `period` seconds with an atomic
+    cache.incr, so concurrent requests each see the count including their
+    own and no more than `capacity` of them pass. The previous window's
+    count is weighted by how much of it still overlaps the last `period`
+    seconds, which smooths the limit over window edges like a bucket
+    refilling at capacity / period.
+    """
+    window, elapsed = divmod(now, period)
+    current = _window_key(key, int(window))
+    # Kept while it still counts as the previous window
+    cache.add(current, 0, period * 2)
+    try:
+        count = cache.incr(current, cost)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(current, cost, period * 2)
+        count = cost
+    previous = cache.get(_window_key(key, int(window) - 1), 0)
+    if count + previous * (1 - elapsed / period) <= capacity:
+        return 0
+    if count > capacity:
+        # Into the next window, until enough of this one has slid out
+        wait = period - elapsed + period * (1 - capacity / count)
+    else:
+        # Until enough of the previous window has slid out
+        wait = period * (1 - (capacity - count) / previous) - elapsed
+    return max(int(math.ceil(wait)), 1)
+
+
+def check_rate_limit(request, bucket='ip', cost=1):
+    """
+    Count `cost` queries against the caller's `bucket` of
+    YONION_CERT_RATE_LIMIT ('ip', or 'batch' for the pairs of batch
+    verifications) and the request against the global bucket. Returns 0
+    when the request may proceed, or the seconds until it may be retried.
+    A request refused by its own bucket does not count against the global
+    one.
+    """
+    now = time.time()
+    limits = settings.YONION_CERT_RATE_LIMIT
+    capacity, period = limits[bucket]
+    retry_after = _take('ratelimit:cert:{}:{}'.format(bucket, client_ip(request)), capacity, period, cost, now)
+    if retry_after:
+        return retry_after
+    capacity, period = limits['global']
+    return _take('ratelimit:cert:global', capacity, period, 1, now)
+
+
+def too_many_requests(retry_after, content=TOO_MANY_REQUESTS_HTML, content_type='text/html; charset=utf-8'):
+    response = HttpResponse(content, status=429, content_type=content_type)
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def rate_limited(view):
+    """
+    Decorator for the certificate API views: over-limit requests get a JSON
+    429 before the view runs.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        retry_after = check_rate_limit(request)
+        if retry_after:
+            return too_many_requests(retry_after, TOO_MANY_REQUESTS_JSON, 'application/json')
+        return view(request, *args, **kwargs)
+    return wrapper
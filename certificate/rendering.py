@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 20:40
+
+import hashlib
+import io
+import json
+import os
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageDraw, ImageFont
+
+# Bump when the layout below changes: every certificate is drawn again
+LAYOUT_VERSION = 1
+
+# A4 landscape at 150 dpi
+PAGE_SIZE = (1754, 1240)
+RESOLUTION = 150.0
+
+BRAND_COLOR = (168, 126, 76)
+TEXT_COLOR = (51, 51, 51)
+
+FORMATS = {
+    'png': ('PNG', 'image/png'),
+    'pdf': ('PDF', 'application/pdf'),
+}
+
+
+def _file_signature(path):
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return [path, stat.st_size, int(stat.st_mtime)]
+
+
+def render_version(cert):
+    """
+    Digest of everything a certificate file is drawn from: the printed Cert
+    fields, the layout, the font and the background template. Files are
+    stored under this digest, so a file exists once per version and is
+    drawn again only when one of them changes.
+    """
+    inputs = [LAYOUT_VERSION, _file_signature(settings.YONION_CERT_TEMPLATE),
+              _file_signature(settings.YONION_CERT_FONT), settings.YONION_CERT_FONT_INDEX,
+              cert.cert_id, cert.user_name, cert.issue_date.isoformat(), cert.program]
+    return hashlib.sha256(json.dumps(inputs, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def file_name(version, extension):
+    return 'certs/{}/{}.{}'.format(version[:2], version, extension)
+
+
+@lru_cache(maxsize=None)
+def _load_font(path, index, size):
+    # Loading a CJK font is most of the drawing time: once per size
+    return ImageFont.truetype(path, size, index=index)
+
+
+def _font(size):
+    try:
+        return _load_font(settings.YONION_CERT_FONT, settings.YONION_CERT_FONT_INDEX, size)
+    except (IOError, OSError):
+        # Pillow's built-in font has no Chinese glyphs: refuse to draw
+        raise ImproperlyConfigured(
+            'YONION_CERT_FONT {!r} cannot be loaded: install fonts-noto-cjk or set it to a font '
+            'with Chinese glyphs'.format(settings.YONION_CERT_FONT))
+
+
+def _text_width(draw, text, font):
+    if hasattr(draw, 'textbbox'):
+        left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+        return right - left
+    return draw.textsize(text, font=font)[0]
+
+
+def _centered(draw, y, text, size, fill=TEXT_COLOR):
+    font = _font(size)
+    draw.text(((PAGE_SIZE[0] - _text_width(draw, text, font)) // 2, y), text, font=font, fill=fill)
+
+
+def draw_certificate(cert):
+    template = settings.YONION_CERT_TEMPLATE
+    if template and os.path.exists(template):
+        image = Image.open(template).convert('RGB').resize(PAGE_SIZE)
+    else:
+        image = Image.new('RGB', PAGE_SIZE, 'white')
+        draw = ImageDraw.Draw(image)
+        draw.rectangle([40, 40, PAGE_SIZE[0] - 40, PAGE_SIZE[1] - 40], outline=BRAND_COLOR, width=8)
+        draw.rectangle([64, 64, PAGE_SIZE[0] - 64, PAGE_SIZE[1] - 64], outline=BRAND_COLOR, width=2)
+
+    draw = ImageDraw.Draw(image)
+    _centered(draw, 240, '瑜伽教练证书', 120, fill=BRAND_COLOR)
+    _centered(draw, 500, '兹证明  {}'.format(cert.user_name), 72)
+    if cert.program:
+        _centered(draw, 620, '已完成  {}  培训，特发此证'.format(cert.program), 56)
+    else:
+        _centered(draw, 620, '已完成培训，特发此证', 56)
+    _centered(draw, 900, '证书编号：{}'.format(cert.cert_id), 44)
+    _centered(draw, 980, '签署时间：{:%Y年%m月%d日}'.format(cert.issue_date), 44)
+    return image
+
+
+def certificate_file(cert, extension):
+    """
+    Storage name of the certificate drawn as PNG or PDF, drawing and saving
+    it first if this version has not been drawn yet.
+    """
+    name = file_name(render_version(cert), extension)
+    if not default_storage.exists(name):
+        image_format, content_type = FORMATS[extension]
+        content = io.BytesIO()
+        draw_certificate(cert).save(content, image_format, resolution=RESOLUTION)
+        default_storage.save(name, ContentFile(content.getvalue()))
+    return name
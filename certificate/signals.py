@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 19:30
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from certificate.admin_search import index_cert_names
+from certificate.bloom import cert_filter, invalidate_cert_filter, publish_cert_ids
+from certificate.models import Cert, CertRevocation
+from certificate.tokens import invalidate_revocations
+
+# Fields signed into the verification tokens
+SIGNED_FIELDS = ('cert_id', 'user_name', 'issue_date')
+
+
+@receiver(pre_save, sender=Cert)
+def remember_signed_fields(sender, instance, raw=False, **kwargs):
+    # Compared in post_save: tokens of the old values must stop verifying
+    instance._signed_values = None
+    if instance.pk and not raw:
+        instance._signed_values = Cert.objects.filter(pk=instance.pk).values(*SIGNED_FIELDS).first()
+
+
+@receiver(post_save, sender=Cert)
+def add_cert_to_filter(sender, instance, **kwargs):
+    old = getattr(instance, '_signed_values', None)
+    if not old or old['cert_id'] != instance.cert_id:
+        cert_id = instance.cert_id
+        cert_filter.add(cert_id)
+        transaction.on_commit(lambda: publish_cert_ids([cert_id]))
+
+    if not old or old['user_name'] != instance.user_name:
+        index_cert_names([(instance.pk, instance.user_name)])
+    if old and any(old[name] != getattr(instance, name) for name in SIGNED_FIELDS):
+        CertRevocation.objects.create(reason='证书信息已修改', automatic=True, **old)
+        # Changing the data back makes the earlier tokens valid again, unless
+        # staff revoked them
+        CertRevocation.objects.filter(automatic=True, **{name: getattr(instance, name) for name in SIGNED_FIELDS}).delete()
+
+
+@receiver(post_delete, sender=Cert)
+def drop_cert_from_filter(sender, instance, **kwargs):
+    # A Bloom filter cannot remove keys; the rebuild leaves the number out
+    invalidate_cert_filter()
+    CertRevocation.objects.create(cert_id=instance.cert_id, user_name=instance.user_name,
+                                  issue_date=instance.issue_date, reason='证书已删除', automatic=True)
+
+
+@receiver(post_save, sender=CertRevocation)
+@receiver(post_delete, sender=CertRevocation)
+def reload_revocations(sender, **kwargs):
+    invalidate_revocations()
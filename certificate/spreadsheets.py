@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 19:00
+
+import csv
+import datetime
+import os
+import zipfile
+from xml.sax.saxutils import escape
+
+try:
+    import openpyxl
+except ImportError:  # XLSX files need openpyxl; CSV always works
+    openpyxl = None
+
+from certificate.models import Cert
+
+# Cert columns read from and written to CSV/XLSX files, in file order
+CERT_COLUMNS = ('cert_id', 'user_name', 'user_id', 'issue_date', 'program')
+
+# Rows fetched per query when exporting
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def column_headers():
+    # Header row of exported files: the Chinese field names
+    return [str(Cert._meta.get_field(name).verbose_name) for name in CERT_COLUMNS]
+
+
+def _header_fields(header):
+    """
+    Map a header row to Cert field names. Headers may be the field names
+    ('cert_id') or their verbose names ('证书编号'); unknown columns map to
+    None and are ignored.
+    """
+    names = {}
+    for name in CERT_COLUMNS:
+        names[name] = name
+        names[str(Cert._meta.get_field(name).verbose_name)] = name
+    return [names.get(str(value).strip()) if value is not None else None for value in header]
+
+
+def file_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return 'xlsx'
+    if extension == '.csv':
+        return 'csv'
+    raise ValueError('unsupported file type {!r}, expected .csv or .xlsx'.format(extension))
+
+
+def _csv_rows(path):
+    # utf-8-sig drops the BOM Excel writes at the start of "UTF-8 CSV" files
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        yield from csv.reader(f)
+
+
+def _xlsx_rows(path):
+    if openpyxl is None:
+        raise ValueError('reading .xlsx files needs openpyxl')
+    # read_only streams the sheet instead of loading it into memory
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_cert_rows(path):
+    """
+    Stream the data rows of a CSV or XLSX file as (row number, {field:
+    value}) with the 1-based row number of the file, header included.
+    Blank rows are skipped.
+    """
+    rows = _xlsx_rows(path) if file_format(path) == 'xlsx' else _csv_rows(path)
+    fields = None
+    for number, row in enumerate(rows, start=1):
+        if fields is None:
+            fields = _header_fields(row)
+            missing = {'cert_id', 'user_name', 'user_id'} - set(fields)
+            if missing:
+                raise ValueError('missing column(s): {}'.format(', '.join(sorted(missing))))
+            continue
+        if not any(value not in (None, '') for value in row):
+            continue
+        yield number, {field: value for field, value in zip(fields, row) if field}
+
+
+def iter_cert_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the CERT_COLUMNS values of every certificate in `queryset`, in
+    primary key order, reading `chunk_size` rows per query. Each query
+    seeks past the last primary key (no OFFSET, no open cursor), so memory
+    stays flat and the cost per chunk does not grow on large exports.
+    """
+    queryset = queryset.order_by('pk').values_list('pk', *CERT_COLUMNS)
+    last = None
+    while True:
+        rows = list((queryset.filter(pk__gt=last) if last is not None else queryset)[:chunk_size])
+        if not rows:
+            return
+        for row in rows:
+            yield row[1:]
+        last = rows[-1][0]
+
+
+def _cell_text(value):
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return '' if value is None else str(value)
+
+
+class _Buffer(object):
+    # File-like sink whose contents are handed out as they are written
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+class _TextSink(object):
+    # csv.writer writes text; the buffer collects UTF-8 bytes
+    def __init__(self, buffer):
+        self.buffer = buffer
+
+    def write(self, text):
+        return self.buffer.write(text.encode('utf-8'))
+
+
+def csv_chunks(rows):
+    """
+    Encode the header and `rows` as CSV, yielding bytes as they are
+    produced. Starts with a BOM so Excel reads the file as UTF-8.
+    """
+    buffer = _Buffer()
+    writer = csv.writer(_TextSink(buffer))
+    yield '\ufeff'.encode('utf-8')
+    writer.writerow(column_headers())
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([_cell_text(value) for value in row])
+        if i % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="证书" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'),
+}
+
+
+def _column_letter(number):
+    # 1 -> 'A', 27 -> 'AA'
+    letters = ''
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def _xlsx_row(number, values):
+    # Readers such as openpyxl 2.6 need the row and cell references
+    cells = ''.join('<c r="{}{}" t="inlineStr"><is><t>{}</t></is></c>'.format(
+        _column_letter(column), number, escape(_cell_text(value))) for column, value in enumerate(values, start=1))
+    return '<row r="{}">{}</row>'.format(number, cells).encode('utf-8')
+
+
+def xlsx_chunks(rows):
+    """
+    Write the header and `rows` as a minimal XLSX workbook, yielding the
+    zip bytes as they are produced: the sheet is deflated row by row into a
+    stream that is drained every EXPORT_CHUNK_SIZE rows, so neither the
+    workbook nor a temporary file is ever held whole (openpyxl's write-only
+    mode still builds the file before it can be sent).
+    """
+    buffer = _Buffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_PARTS.items():
+            workbook.writestr(name, content)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                        b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                        b'<sheetData>')
+            sheet.write(_xlsx_row(1, column_headers()))
+            for i, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row(i + 1, row))
+                if i % EXPORT_CHUNK_SIZE == 0:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+def export_chunks(queryset, extension):
+    rows = iter_cert_rows(queryset)
+    return xlsx_chunks(rows) if extension == 'xlsx' else csv_chunks(rows)
@@ -1,3 +1,411 @@
-from django.test import TestCase
+import csv
+import datetime
+import importlib
+import io
+import json
+import os
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from openpyxl import load_workbook
+from PIL import Image
+
+from certificate.admin_search import name_grams, search_certs
+from certificate.bloom import BloomFilter, CertFilter, cert_filter
+from certificate.models import Cert, CertNameGram, CertRevocation
+from certificate.ratelimit import check_rate_limit, client_ip
+from certificate.rendering import certificate_file, draw_certificate, render_version
+from certificate.spreadsheets import column_headers, csv_chunks, iter_cert_rows, read_cert_rows, xlsx_chunks
+from certificate.tokens import make_token, verify_token
+from certificate.verification import verify_certs
+
+
+def create_cert(number, user_name='张三', **kwargs):
+    fields = dict(cert_id=number, user_name=user_name, user_id='1101011990010{:05d}'.format(int(number[-5:])),
+                  issue_date=datetime.date(2019, 5, 1), program='RYT200')
+    fields.update(kwargs)
+    return Cert.objects.create(**fields)
+
+
+def temporary_path(test, name):
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return os.path.join(directory.name, name)
+
+
+class VerifyApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_cert('YY2019000001')
+        # Every number may exist: the lookups go to the database
+        patcher = mock.patch.object(cert_filter, 'get_filter', return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_verify(self):
+        response = self.client.get('/api/certs/verify/', {'cert_id': 'YY2019000001', 'user_name': '张三'})
+        self.assertEqual(response.json(), {'cert_id': 'YY2019000001', 'user_name': '张三', 'status': 'valid',
+                                           'issue_date': '2019-05-01', 'program': 'RYT200'})
+        response = self.client.post('/api/certs/verify/', {'cert_id': 'YY2019000001', 'user_name': '李四'})
+        self.assertEqual(response.json()['status'], 'name_mismatch')
+        self.assertEqual(self.client.get('/api/certs/verify/', {'cert_id': 'YY2019000001'}).status_code, 400)
+
+    def test_batch(self):
+        pairs = [{'cert_id': 'YY2019999999', 'user_name': '张三'}, {'cert_id': 'YY2019000001', 'user_name': '张三'},
+                 {'cert_id': '', 'user_name': '张三'}]
+        for content_type, body in (('application/json', json.dumps(pairs)),
+                                   ('application/x-ndjson', '\n'.join(json.dumps(pair) for pair in pairs))):
+            response = self.client.post('/api/certs/verify/batch/', body, content_type=content_type)
+            lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+            self.assertEqual([json.loads(line)['status'] for line in lines], ['not_found', 'valid', 'invalid'])
+
+    def test_one_query_per_batch(self):
+        with self.assertNumQueries(1):
+            results = verify_certs([('YY2019{:06d}'.format(i), '张三') for i in range(1, 101)])
+        self.assertEqual([result['status'] for result in results[:2]], ['valid', 'not_found'])
+
+    @override_settings(YONION_CERT_VERIFY_BATCH_SIZE=2)
+    def test_batch_errors(self):
+        pairs = [{'cert_id': 'YY2019000001', 'user_name': '张三'}] * 3
+        response = self.client.post('/api/certs/verify/batch/', json.dumps(pairs), content_type='application/json')
+        self.assertEqual(response.status_code, 413)
+        response = self.client.post('/api/certs/verify/batch/', '{"cert_id": 1}', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        create_cert('YY2019000001')
+        self.path = temporary_path(self, 'certs.csv')
+
+    def write_rows(self, *rows):
+        with open(self.path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['证书编号', 'user_name', 'user_id', 'issue_date', 'program'])
+            writer.writerows(rows)
+
+    def import_certs(self, *args):
+        call_command('import_certs', self.path, *args, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def test_duplicates_are_rejected(self):
+        self.write_rows(
+            ['YY2019000001', '李四', '110101199001000002', '2019-05-01', 'RYT200'],
+            ['YY2019000002', '王五', '110101199001000003', '2019/05/01', 'RYT200'],
+            ['YY2019000003', '赵六', '110101199001000003', '2019-05-01', 'RYT200'],
+            ['YY2019000004', '孙七', '110101199001000004', '2019-13-01', 'RYT200'],
+            ['YY2019000005', '周八', '110101199001000001', '2019-05-01', 'RYT200'],
+        )
+        errors = temporary_path(self, 'errors.csv')
+        self.import_certs('--batch-size', '2', '--errors', errors)
+
+        self.assertEqual(list(Cert.objects.order_by('cert_id').values_list('cert_id', flat=True)),
+                         ['YY2019000001', 'YY2019000002'])
+        self.assertEqual(Cert.objects.get(cert_id='YY2019000002').issue_date, datetime.date(2019, 5, 1))
+        with open(errors, encoding='utf-8-sig') as f:
+            rejected = [(row[0], row[1]) for row in list(csv.reader(f))[1:]]
+        self.assertEqual(sorted(rejected), [('2', 'YY2019000001'), ('4', 'YY2019000003'), ('5', 'YY2019000004'),
+                                    ('6', 'YY2019000005')])
+        self.assertFalse(os.path.exists(self.path + '.progress'))
+
+    def test_resume_after_failure(self):
+        self.write_rows(*[['YY20190000{:02d}'.format(i), '学员', '1101011990010000{:02d}'.format(i), '2019-05-01', '']
+                          for i in range(2, 8)])
+        bulk_create = Cert.objects.bulk_create
+        calls = []
+
+        def failing_bulk_create(certs):
+            calls.append(certs)
+            if len(calls) == 2:
+                raise DatabaseError('connection lost')
+            return bulk_create(certs)
+
+        with mock.patch.object(Cert.objects, 'bulk_create', failing_bulk_create):
+            with self.assertRaisesMessage(CommandError, 'Rows 4-5 failed'):
+                self.import_certs('--batch-size', '2')
+        self.assertEqual(Cert.objects.count(), 3)
+        with open(self.path + '.progress') as f:
+            self.assertEqual(json.load(f), {'row': 3})
+
+        self.import_certs('--batch-size', '2', '--resume')
+        self.assertEqual(Cert.objects.count(), 7)
+        self.assertFalse(os.path.exists(self.path + '.progress'))
+
+
+@override_settings(YONION_CERT_RATE_LIMIT={'ip': (3, 60), 'batch': (10, 60), 'global': (100, 1)},
+                   YONION_RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR', YONION_RATE_LIMIT_PROXY_COUNT=1)
+class RateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        # At the start of a window: nothing carried over from the last one
+        patcher = mock.patch('certificate.ratelimit.time.time', return_value=600000.0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, forwarded_for):
+        return self.factory.get('/certificate/', HTTP_X_FORWARDED_FOR=forwarded_for)
+
+    def test_client_ip_is_last_forwarded_address(self):
+        self.assertEqual(client_ip(self.request('1.1.1.1, 2.2.2.2')), '2.2.2.2')
+        self.assertEqual(client_ip(self.request('2.2.2.2')), '2.2.2.2')
+
+    def test_limit_per_ip(self):
+        for i in range(3):
+            self.assertEqual(check_rate_limit(self.request('2.2.2.2')), 0)
+        self.assertGreater(check_rate_limit(self.request('2.2.2.2')), 0)
+        # A forged first entry does not give a new bucket
+        self.assertGreater(check_rate_limit(self.request('9.9.9.9, 2.2.2.2')), 0)
+        self.assertEqual(check_rate_limit(self.request('3.3.3.3')), 0)
+
+    def test_batch_cost(self):
+        self.assertEqual(check_rate_limit(self.request('2.2.2.2'), 'batch', cost=8), 0)
+        self.assertGreater(check_rate_limit(self.request('2.2.2.2'), 'batch', cost=3), 0)
+        # The per-request bucket is separate
+        self.assertEqual(check_rate_limit(self.request('2.2.2.2')), 0)
+
+
+class VerifyTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.cert = create_cert('YY2019000001')
+
+    def test_valid_token(self):
+        result = verify_token(make_token(self.cert))
+        self.assertEqual(result['status'], 'valid')
+        self.assertEqual(result['cert_id'], 'YY2019000001')
+        self.assertEqual(result['user_name'], '张三')
+        self.assertEqual(result['issue_date'], datetime.date(2019, 5, 1))
+
+    def test_tampered_token(self):
+        token = make_token(self.cert)
+        self.assertIsNone(verify_token(token[:-1] + ('A' if token[-1] != 'A' else 'B')))
+        self.assertIsNone(verify_token('not-a-token'))
+
+    def test_edited_certificate_revokes_old_token(self):
+        old_token = make_token(self.cert)
+        self.cert.user_name = '李四'
+        self.cert.save()
+        self.assertEqual(verify_token(old_token)['status'], 'revoked')
+        self.assertEqual(verify_token(make_token(self.cert))['status'], 'valid')
+
+        # Changing the data back makes the old token valid again
+        self.cert.user_name = '张三'
+        self.cert.save()
+        self.assertEqual(verify_token(old_token)['status'], 'valid')
+
+    def test_staff_revocation_survives_edit_back(self):
+        token = make_token(self.cert)
+        CertRevocation.objects.create(cert_id=self.cert.cert_id, user_name=self.cert.user_name,
+                                      issue_date=self.cert.issue_date, reason='人工撤销')
+        self.cert.user_name = '李四'
+        self.cert.save()
+        self.cert.user_name = '张三'
+        self.cert.save()
+        self.assertEqual(verify_token(token)['status'], 'revoked')
+
+    def test_deleted_certificate_revokes_token(self):
+        token = make_token(self.cert)
+        self.cert.delete()
+        self.assertEqual(verify_token(token)['status'], 'revoked')
+
+
+class RenderingTests(TestCase):
+    def setUp(self):
+        self.cert = create_cert('YY2019000001')
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+
+    def test_version_follows_printed_fields(self):
+        version = render_version(self.cert)
+        self.assertEqual(render_version(Cert.objects.get(pk=self.cert.pk)), version)
+        self.cert.user_name = '李四'
+        self.assertNotEqual(render_version(self.cert), version)
+
+    def test_drawn_once_per_version(self):
+        with mock.patch('certificate.rendering.draw_certificate', return_value=Image.new('RGB', (20, 10))) as draw:
+            name = certificate_file(self.cert, 'png')
+            self.assertEqual(certificate_file(self.cert, 'png'), name)
+            self.assertEqual(draw.call_count, 1)
+            self.assertTrue(default_storage.exists(name))
+
+            certificate_file(self.cert, 'pdf')
+            self.cert.program = 'RYT500'
+            self.assertNotEqual(certificate_file(self.cert, 'png'), name)
+            self.assertEqual(draw.call_count, 3)
+
+    @override_settings(YONION_CERT_FONT='/nonexistent/font.ttc')
+    def test_missing_font(self):
+        with self.assertRaises(ImproperlyConfigured):
+            draw_certificate(self.cert)
+
+
+class AdminSearchTests(TestCase):
+    def setUp(self):
+        self.zhang = create_cert('YY2019000001', user_name='张小明')
+        self.li = create_cert('YY2019000002', user_name='李小明', program='RYT500')
+        self.zhang_san = create_cert('YY2019000003', user_name='张 三')
+
+    def search(self, term):
+        queryset, truncated = search_certs(Cert.objects.all(), term)
+        return set(queryset.values_list('user_name', flat=True)), truncated
+
+    def test_name_grams(self):
+        self.assertEqual(name_grams('张 小明'), {'张', '小', '明', '张小', '小明'})
+
+    def test_search(self):
+        self.assertEqual(self.search('小明'), ({'张小明', '李小明'}, []))
+        self.assertEqual(self.search('张'), ({'张小明', '张 三'}, []))
+        self.assertEqual(self.search('张 小明'), ({'张小明'}, []))
+        self.assertEqual(self.search('明小'), (set(), []))
+        # Numbers and programs by prefix
+        self.assertEqual(self.search('YY2019000002'), ({'李小明'}, []))
+        self.assertEqual(self.search('RYT5'), ({'李小明'}, []))
+        self.assertEqual(self.search('110101199001000003'), ({'张 三'}, []))
+
+    def test_renamed_certificate_is_reindexed(self):
+        self.li.user_name = '李四'
+        self.li.save()
+        self.assertEqual(self.search('小明'), ({'张小明'}, []))
+        self.assertEqual(self.search('李四'), ({'李四'}, []))
+        self.li.delete()
+        self.assertFalse(CertNameGram.objects.filter(cert=self.li.pk).exists())
+
+    def test_common_name_is_applied_last(self):
+        with mock.patch('certificate.admin_search.NAME_MATCH_LIMIT', 1):
+            self.assertEqual(self.search('小明')[1], ['小明'])
+            # Matched among the results of "张小" instead of cut at the limit
+            self.assertEqual(self.search('小明 张小'), ({'张小明'}, []))
+
+    def test_backfill(self):
+        CertNameGram.objects.all().delete()
+        migration = importlib.import_module('certificate.migrations.0012_backfill_cert_name_grams')
+        migration.index_cert_names(apps, None)
+        self.assertEqual(self.search('小明'), ({'张小明', '李小明'}, []))
+
+    @override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+    def test_changelist(self):
+        user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        with mock.patch('certificate.admin_search.NAME_MATCH_LIMIT', 1):
+            response = self.client.get('/django-admin/certificate/cert/', {'q': '小明'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), 1)
+        self.assertEqual(len(list(response.context['messages'])), 1)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        create_cert('YY2019000002', user_name='王五')
+        create_cert('YY2019000001', user_name='张三', program='<RYT & 500>')
+
+    def test_iter_cert_rows_in_chunks(self):
+        rows = list(iter_cert_rows(Cert.objects.all(), chunk_size=1))
+        self.assertEqual([row[0] for row in rows], ['YY2019000002', 'YY2019000001'])
+
+    def test_xlsx(self):
+        data = b''.join(xlsx_chunks(iter_cert_rows(Cert.objects.all())))
+        sheet = load_workbook(io.BytesIO(data)).active
+        rows = [[cell.value for cell in row] for row in sheet.iter_rows()]
+        self.assertEqual(rows[0], list(column_headers()))
+        self.assertEqual(rows[1][:2], ['YY2019000002', '王五'])
+        self.assertEqual(rows[2], ['YY2019000001', '张三', '110101199001000001', '2019-05-01', '<RYT & 500>'])
+
+    def test_csv(self):
+        text = b''.join(csv_chunks(iter_cert_rows(Cert.objects.all()))).decode('utf-8')
+        lines = text.lstrip('\ufeff').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[2], 'YY2019000001,张三,110101199001000001,2019-05-01,<RYT & 500>')
+
+    def test_round_trip(self):
+        # Exported files can be imported again
+        for name, chunks in (('certs.xlsx', xlsx_chunks), ('certs.csv', csv_chunks)):
+            path = temporary_path(self, name)
+            with open(path, 'wb') as f:
+                for chunk in chunks(iter_cert_rows(Cert.objects.all())):
+                    f.write(chunk)
+            rows = list(read_cert_rows(path))
+            self.assertEqual([number for number, row in rows], [2, 3])
+            self.assertEqual(rows[1][1], {'cert_id': 'YY2019000001', 'user_name': '张三',
+                                          'user_id': '110101199001000001', 'issue_date': '2019-05-01',
+                                          'program': '<RYT & 500>'})
+
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = ['yy{:06d}'.format(i) for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(1 for i in range(10000) if 'unknown{}'.format(i) in bloom)
+        self.assertLess(false_positives, 300)
+
+
+class CertFilterTests(TransactionTestCase):
+    # Transactions are committed: publishing new numbers waits for the commit
+
+    def setUp(self):
+        cache.clear()
+        self.cert = create_cert('YY2019000001')
+
+    def patch_rebuild(self, cert_filter):
+        patcher = mock.patch.object(cert_filter, '_rebuild_in_background')
+        rebuild = patcher.start()
+        self.addCleanup(patcher.stop)
+        return rebuild
+
+    def test_lookup(self):
+        cert_filter = CertFilter()
+        self.assertTrue(cert_filter.might_exist('YY2019000001'))
+        self.assertTrue(cert_filter.might_exist(' yy2019000001 '))
+        self.assertFalse(cert_filter.might_exist('YY2019999999'))
+
+    def test_new_numbers_reach_other_processes_without_rebuild(self):
+        other = CertFilter()
+        other.get_filter()
+        rebuild = self.patch_rebuild(other)
+
+        create_cert('YY2019000002')
+        self.assertTrue(other.might_exist('YY2019000002'))
+        rebuild.assert_not_called()
+
+    def test_delete_rebuilds_in_background(self):
+        cert_filter = CertFilter()
+        cert_filter.get_filter()
+        rebuild = self.patch_rebuild(cert_filter)
+
+        self.cert.delete()
+        # The old filter answers until the new one is built
+        self.assertTrue(cert_filter.might_exist('YY2019000001'))
+        self.assertEqual(rebuild.call_count, 1)
+
+        generation, journal = rebuild.call_args[0]
+        cert_filter._build(generation, journal)
+        self.assertFalse(cert_filter.might_exist('YY2019000001'))
+
+    def test_lost_journal_sends_lookups_to_the_database(self):
+        other = CertFilter()
+        other.get_filter()
+        rebuild = self.patch_rebuild(other)
+
+        create_cert('YY2019000002')
+        cache.delete('certs-added:{}'.format(other._journal + 1))
+        self.assertIsNone(other.get_filter())
+        self.assertTrue(other.might_exist('YY2019999999'))
+        self.assertEqual(rebuild.call_count, 1)
+
+        generation, journal = rebuild.call_args[0]
+        other._build(generation, journal)
+        self.assertTrue(other.might_exist('YY2019000002'))
+        self.assertFalse(other.might_exist('YY2019999999'))
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 20:10
+
+import hashlib
+import io
+import json
+import threading
+
+from django.core import signing
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils.dateparse import parse_date
+from django.utils.safestring import mark_safe
+
+from home.generations import bump_generation, get_generation
+
+try:
+    import qrcode
+    import qrcode.image.svg
+except ImportError:  # the verification link is shown without a QR code
+    qrcode = None
+
+SALT = 'certificate.verify'
+
+# QR codes only depend on the URL and can be kept for long
+QR_CODE_TIMEOUT = 30 * 24 * 60 * 60
+
+
+def make_token(cert):
+    """
+    URL-safe token carrying the cert_id, holder name and issue date of
+    `cert`, signed with SECRET_KEY. The same certificate always gets the
+    same token.
+    """
+    payload = json.dumps([cert.cert_id, cert.user_name, cert.issue_date.isoformat()],
+                         ensure_ascii=False, separators=(',', ':'))
+    return signing.Signer(salt=SALT).sign(signing.b64_encode(payload.encode('utf-8')).decode())
+
+
+def read_token(token):
+    """
+    Return {'cert_id', 'user_name', 'issue_date'} signed into `token`.
+    Raises signing.BadSignature for tokens we did not issue. CPU only.
+    """
+    data = signing.Signer(salt=SALT).unsign(token)
+    try:
+        cert_id, user_name, issue_date = json.loads(signing.b64_decode(data.encode()).decode('utf-8'))
+        issue_date = parse_date(issue_date)
+    except (TypeError, ValueError):
+        issue_date = None
+    if issue_date is None:
+        raise signing.BadSignature('Malformed certificate token')
+    return {'cert_id': cert_id, 'user_name': user_name, 'issue_date': issue_date}
+
+
+class RevocationList(object):
+    """
+    (cert_id, user_name, issue_date) triples whose tokens are no longer
+    valid, see `CertRevocation`. Kept per process and reloaded once the
+    'cert-revocations' generation moved, so a check costs one cache read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._generation = None
+        self._revoked = frozenset()
+
+    def _load(self):
+        from certificate.models import CertRevocation
+
+        return frozenset(CertRevocation.objects.values_list('cert_id', 'user_name', 'issue_date'))
+
+    def is_revoked(self, cert_id, user_name, issue_date):
+        generation = get_generation('cert-revocations')
+        if generation != self._generation:
+            with self._lock:
+                if generation != self._generation:
+                    self._revoked = self._load()
+                    self._generation = generation
+        return (cert_id, user_name, issue_date) in self._revoked
+
+
+revocations = RevocationList()
+
+
+def invalidate_revocations():
+    bump_generation('cert-revocations')
+
+
+def verify_token(token):
+    """
+    Check a verification token without touching the Cert table. Returns
+    the signed fields with status 'valid' or 'revoked', or None when the
+    signature does not hold.
+    """
+    try:
+        fields = read_token(token)
+    except signing.BadSignature:
+        return None
+    revoked = revocations.is_revoked(fields['cert_id'], fields['user_name'], fields['issue_date'])
+    return dict(fields, status='revoked' if revoked else 'valid')
+
+
+def verification_url(request, cert):
+    return request.build_absolute_uri(reverse('cert_verify_token', args=[make_token(cert)]))
+
+
+def download_url(cert, extension):
+    return reverse('cert_download', args=[make_token(cert), extension])
+
+
+def qr_code_svg(url):
+    """
+    Inline SVG QR code for `url`, or None when qrcode is not installed.
+    """
+    if qrcode is None:
+        return None
+    key = 'cert-qr:{}'.format(hashlib.md5(url.encode('utf-8')).hexdigest())
+    svg = cache.get(key)
+    if svg is None:
+        stream = io.BytesIO()
+        qrcode.make(url, image_factory=qrcode.image.svg.SvgPathImage, box_size=8, border=2).save(stream)
+        svg = stream.getvalue().decode('utf-8')
+        # Drop the XML declaration so the image can be inlined
+        svg = svg[svg.index('<svg'):]
+        cache.set(key, svg, QR_CODE_TIMEOUT)
+    return mark_safe(svg)
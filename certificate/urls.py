@@ -3,4 +3,14 @@
 # Email: yaoqiujie@gscopetech.com
 # @Time: 2019-05-29 11:10
 
-from django.conf.urls import include, url
+from django.conf.urls import url
+
+from certificate import views
+
+urlpatterns = [
+    url(r'^verify/$', views.verify, name='cert_verify'),
+    url(r'^verify/batch/$', views.verify_batch, name='cert_verify_batch'),
+    url(r'^verify/(?P<token>[\w.:-]+)/$', views.verify_signed, name='cert_verify_token'),
+    url(r'^verify/(?P<token>[\w.:-]+)/certificate\.(?P<extension>png|pdf)$', views.download, name='cert_download'),
+    url(r'^files/(?P<version>[0-9a-f]{64})\.(?P<extension>png|pdf)$', views.certificate, name='cert_file'),
+]
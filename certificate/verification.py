@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 18:40
+
+from certificate.bloom import cert_filter
+from certificate.models import Cert
+
+# Verification results; the holder's ID number is never part of a result
+VALID = 'valid'
+NAME_MISMATCH = 'name_mismatch'
+NOT_FOUND = 'not_found'
+INVALID = 'invalid'
+
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else ''
+
+
+def _result(cert_id, user_name, cert):
+    if not cert_id or not user_name:
+        return {'cert_id': cert_id, 'user_name': user_name, 'status': INVALID}
+    if cert is None:
+        return {'cert_id': cert_id, 'user_name': user_name, 'status': NOT_FOUND}
+    if cert['user_name'] != user_name:
+        return {'cert_id': cert_id, 'user_name': user_name, 'status': NAME_MISMATCH}
+    return {
+        'cert_id': cert_id,
+        'user_name': user_name,
+        'status': VALID,
+        'issue_date': cert['issue_date'].isoformat(),
+        'program': cert['program'],
+    }
+
+
+def verify_certs(pairs):
+    """
+    Check (cert_id, user_name) pairs against the certificates. Returns one
+    result dict per pair, in the given order, with the status 'valid',
+    'name_mismatch', 'not_found' or 'invalid' (a value missing); issue date
+    and program are only included for valid pairs. All pairs are resolved
+    with a single `cert_id IN (...)` query, none when the cert filter rules
+    out every number.
+    """
+    pairs = [(_clean(cert_id), _clean(user_name)) for cert_id, user_name in pairs]
+    # Numbers the filter rules out never reach the query
+    cert_ids = {cert_id for cert_id, user_name in pairs if cert_id and cert_filter.might_exist(cert_id)}
+
+    # Keyed case-insensitively: MySQL's default collation matches
+    # "yn001" to "YN001" like the query page does
+    certs = {}
+    if cert_ids:
+        for cert in Cert.objects.filter(cert_id__in=cert_ids).values('cert_id', 'user_name', 'issue_date', 'program'):
+            certs[cert['cert_id'].lower()] = cert
+    return [_result(cert_id, user_name, certs.get(cert_id.lower())) for cert_id, user_name in pairs]
+
+
+def verify_cert(cert_id, user_name):
+    return verify_certs([(cert_id, user_name)])[0]
@@ -3,8 +3,127 @@
 # Email: yaoqiujie@gscopetech.com
 # @Time: 2019-05-29 11:10
 
-from django.shortcuts import render
-from django.http import HttpResponse, HttpResponseRedirect, HttpResponseBadRequest
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods, require_POST
 
 from certificate.forms import CertQueryForm
 from certificate.models import Cert
+from certificate.ratelimit import TOO_MANY_REQUESTS_JSON, check_rate_limit, rate_limited, too_many_requests
+from certificate.rendering import FORMATS, certificate_file, file_name, render_version
+from certificate.tokens import verify_token
+from certificate.verification import verify_cert, verify_certs
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status, json_dumps_params={'ensure_ascii': False})
+
+
+def _batch_pairs(request):
+    """
+    (cert_id, user_name) pairs of a batch request: a JSON array of objects,
+    or NDJSON (one object per line) with Content-Type application/x-ndjson.
+    Raises ValueError on a malformed body.
+    """
+    body = request.body.decode('utf-8')
+    if request.content_type == 'application/x-ndjson':
+        items = [json.loads(line) for line in body.splitlines() if line.strip()]
+    else:
+        items = json.loads(body)
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        raise ValueError('expected a list of objects')
+    return [(item.get('cert_id'), item.get('user_name')) for item in items]
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+@rate_limited
+def verify(request):
+    """
+    Verify one certificate: cert_id and user_name as query or form
+    parameters. Answers {'cert_id', 'user_name', 'status', ...} as JSON.
+    """
+    form = CertQueryForm(request.GET if request.method == 'GET' else request.POST)
+    if not form.is_valid():
+        return _error('cert_id and user_name are required')
+    result = verify_cert(form.cleaned_data['cert_id'], form.cleaned_data['user_name'])
+    return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
+
+
+@csrf_exempt
+@require_POST
+def verify_batch(request):
+    """
+    Verify up to YONION_CERT_VERIFY_BATCH_SIZE pairs in one request with a
+    single database query. The results are streamed back as NDJSON, one line
+    per pair in request order. Every pair counts against the caller's
+    'batch' rate limit.
+    """
+    try:
+        pairs = _batch_pairs(request)
+    except ValueError:
+        return _error('expected a JSON array (or NDJSON lines) of {"cert_id", "user_name"} objects')
+    if len(pairs) > settings.YONION_CERT_VERIFY_BATCH_SIZE:
+        return _error('at most {} certificates per request'.format(settings.YONION_CERT_VERIFY_BATCH_SIZE), status=413)
+    retry_after = check_rate_limit(request, 'batch', cost=max(len(pairs), 1))
+    if retry_after:
+        return too_many_requests(retry_after, TOO_MANY_REQUESTS_JSON, 'application/json')
+
+    results = verify_certs(pairs)
+    lines = (json.dumps(result, ensure_ascii=False) + '\n' for result in results)
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson; charset=utf-8')
+
+
+@require_http_methods(['GET'])
+def verify_signed(request, token):
+    """
+    Target of the verification link / QR code on a certificate. The token
+    is checked against its signature and the revocation list only, without
+    a database lookup. Answers JSON with ?format=json or an Accept header
+    asking for it, a small page otherwise.
+    """
+    result = verify_token(token)
+    if request.GET.get('format') == 'json' or 'application/json' in request.META.get('HTTP_ACCEPT', ''):
+        if result is None:
+            return _error('invalid token', status=404)
+        result = dict(result, issue_date=result['issue_date'].isoformat())
+        return JsonResponse(result, json_dumps_params={'ensure_ascii': False})
+    return render(request, 'certificate/cert_token.html', {'result': result}, status=200 if result else 404)
+
+
+@require_http_methods(['GET'])
+def download(request, token, extension):
+    """
+    Printable certificate (PNG or PDF) for a verification token: redirects
+    to the file of the certificate's current version, drawing it on first
+    request.
+    """
+    result = verify_token(token)
+    if result is None or result['status'] != 'valid':
+        raise Http404
+    cert = Cert.objects.filter(cert_id=result['cert_id'], user_name=result['user_name'],
+                               issue_date=result['issue_date']).first()
+    if cert is None:
+        raise Http404
+    certificate_file(cert, extension)
+    return redirect('cert_file', version=render_version(cert), extension=extension)
+
+
+@require_http_methods(['GET'])
+def certificate(request, version, extension):
+    """
+    A drawn certificate by version digest. The URL changes with every
+    version, so browsers and proxies may keep the response for good.
+    """
+    name = file_name(version, extension)
+    if not default_storage.exists(name):
+        raise Http404
+    response = FileResponse(default_storage.open(name), content_type=FORMATS[extension][1])
+    response['Cache-Control'] = 'public, max-age={}, immutable'.format(settings.YONION_CERT_FILE_MAX_AGE)
+    response['Content-Disposition'] = 'inline; filename="certificate.{}"'.format(extension)
+    return response
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0006_auto_20190530_1317'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursepage',
+            index=models.Index(fields=['category'], name='course_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursepagetag',
+            index=models.Index(fields=['tag', 'content_object'], name='course_tag_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursepagetag',
+            index=models.Index(fields=['content_object', 'tag'], name='course_object_tag_idx'),
+        ),
+    ]
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from django.db import models
-from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.models import TaggedItemBase
@@ -13,6 +12,9 @@ from wagtail.admin.edit_handlers import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.images.edit_handlers import ImageChooserPanel
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.images.models import Image
+from home.gallery import first_gallery_item
+from home.listing import paginate_listing
+from home.wallpapers import get_wallpaper
 from wagtail.search import index
 
 # Create your models here.
@@ -27,18 +29,9 @@ class CourseIndexPage(Page):
     def get_context(self, request):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
-        coursepages = self.get_children().live().order_by('-first_published_at')
-        wallpaper = Image.objects.filter(tags__name="课程壁纸").order_by('-created_at')[0]
-        paginator = Paginator(coursepages, 3) # Show 3 resources per page
-        page = request.GET.get('page')
-        try:
-            coursepages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            coursepages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            coursepages = paginator.page(paginator.num_pages)
+        coursepages = self.get_children().live().specific().order_by('-first_published_at')
+        wallpaper = get_wallpaper("课程壁纸")
+        coursepages = paginate_listing(request, coursepages, 3) # Show 3 resources per page
 
         # make the variable 'resources' available on the template
         context['coursepages'] = coursepages
@@ -57,6 +50,13 @@ class CoursePageTag(TaggedItemBase):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        # ?tag= listings resolve the tag first, keyset scans probe per page
+        indexes = [
+            models.Index(fields=['tag', 'content_object'], name='course_tag_object_idx'),
+            models.Index(fields=['content_object', 'tag'], name='course_object_tag_idx'),
+        ]
+
 
 class CourseTagIndexPage(Page):
     def get_context(self, request):
@@ -71,17 +71,8 @@ class CourseTagIndexPage(Page):
         cate = request.GET.get('cate')
         if cate and cate != '':
             coursepages = coursepages.filter(category=cate).order_by('-first_published_at')
-        wallpaper = Image.objects.filter(tags__name="课程壁纸").order_by('-created_at')[0]
-        paginator = Paginator(coursepages, 6) # Show 6 resources per page
-        page = request.GET.get('page')
-        try:
-            coursepages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            coursepages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            coursepages = paginator.page(paginator.num_pages)
+        wallpaper = get_wallpaper("课程壁纸")
+        coursepages = paginate_listing(request, coursepages, 6) # Show 6 resources per page
 
         # Update template context
         context = super().get_context(request)
@@ -116,9 +107,12 @@ class CoursePage(Page):
     class Meta:
         verbose_name = '课程详情页'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['category'], name='course_category_idx'),
+        ]
 
     def main_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
@@ -145,7 +139,7 @@ class CoursePage(Page):
     ]
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="课程壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("课程壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
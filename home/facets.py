@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 14:30
+
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Sum
+from wagtail.core.models import Page
+
+from home.generations import bump_generation, get_generation
+
+# Page types listed by the tag index pages, filtered by ?tag= and ?cate=
+FACETED_PAGE_TYPES = (
+    'course.CoursePage',
+    'mentor.MentorPage',
+    'trainee.TraineePage',
+    'news.NewsPage',
+)
+
+
+def faceted_models():
+    return [apps.get_model(label) for label in FACETED_PAGE_TYPES]
+
+
+def _page_facets(model, pks):
+    """
+    Return {pk: {(kind, value), ...}} for the live pages of `model` among
+    `pks` (every live page when None), without loading the pages.
+    """
+    pages = model.objects.live().order_by()
+    if pks is not None:
+        pages = pages.filter(pk__in=pks)
+    facets = {pk: {('category', category)} if category else set()
+              for pk, category in pages.values_list('pk', 'category')}
+    for pk, name in (model.tags.through.objects
+                     .filter(content_object__in=list(facets))
+                     .values_list('content_object_id', 'tag__name')):
+        facets[pk].add(('tag', name))
+    return facets
+
+
+def _bump_facets():
+    # After the commit: readers must not cache the old counts as new
+    transaction.on_commit(lambda: bump_generation('facets'))
+
+
+def update_page_facets(model, pk, live=True):
+    """
+    Move the counts of one page type by what changed for page `pk` since it
+    was last counted: its new tags and category count +1, the ones it no
+    longer has (all of them when it is not `live`) -1. Called from
+    `home.signals` on publish, unpublish and before a delete.
+    """
+    from home.models import ListingFacet, PageFacet
+
+    content_type = ContentType.objects.get_for_model(model)
+    with transaction.atomic():
+        # Serializes updates of the same page, so its delta is applied once
+        locked = list(Page.objects.select_for_update().filter(pk=pk).values_list('pk', flat=True))
+        new = _page_facets(model, [pk]).get(pk, set()) if live and locked else set()
+        old = set(PageFacet.objects.filter(page_id=pk).values_list('kind', 'value'))
+        added, removed = new - old, old - new
+        if not added and not removed:
+            return
+
+        for kind, value in added:
+            ListingFacet.objects.get_or_create(content_type=content_type, kind=kind, value=value)
+        for facets, step in ((added, 1), (removed, -1)):
+            for kind in {kind for kind, value in facets}:
+                values = [value for facet_kind, value in facets if facet_kind == kind]
+                (ListingFacet.objects
+                 .filter(content_type=content_type, kind=kind, value__in=values)
+                 .update(count=F('count') + step))
+        for kind in {kind for kind, value in removed}:
+            values = [value for facet_kind, value in removed if facet_kind == kind]
+            PageFacet.objects.filter(page_id=pk, kind=kind, value__in=values).delete()
+        PageFacet.objects.bulk_create([PageFacet(page_id=pk, kind=kind, value=value) for kind, value in added])
+    _bump_facets()
+
+
+def rename_tag_facets(old_name, new_name):
+    """
+    A renamed Tag keeps its pages: only the stored facet values change.
+    """
+    from home.models import ListingFacet, PageFacet
+
+    with transaction.atomic():
+        ListingFacet.objects.filter(kind='tag', value=old_name).update(value=new_name)
+        PageFacet.objects.filter(kind='tag', value=old_name).update(value=new_name)
+    _bump_facets()
+
+
+def delete_tag_facets(name):
+    # Deleting a Tag untags its pages without publishing them
+    from home.models import ListingFacet, PageFacet
+
+    with transaction.atomic():
+        ListingFacet.objects.filter(kind='tag', value=name).delete()
+        PageFacet.objects.filter(kind='tag', value=name).delete()
+    _bump_facets()
+
+
+def refresh_facets(model):
+    """
+    Recount the live pages per tag and per category of one page type from
+    scratch (`manage.py rebuild_facets`); publishing only applies deltas,
+    see `update_page_facets`.
+    """
+    from home.models import ListingFacet, PageFacet
+
+    content_type = ContentType.objects.get_for_model(model)
+    facets = _page_facets(model, None)
+    counts = Counter(facet for page_facets in facets.values() for facet in page_facets)
+
+    with transaction.atomic():
+        PageFacet.objects.filter(page__content_type=content_type).delete()
+        PageFacet.objects.bulk_create(
+            [PageFacet(page_id=pk, kind=kind, value=value) for pk, page_facets in facets.items()
+             for kind, value in page_facets], batch_size=500)
+        ListingFacet.objects.filter(content_type=content_type).delete()
+        ListingFacet.objects.bulk_create(
+            [ListingFacet(content_type=content_type, kind=kind, value=value, count=count)
+             for (kind, value), count in counts.items()])
+    _bump_facets()
+
+
+def category_label(models, value):
+    for model in models:
+        label = dict(getattr(model, 'CATEGORY_CHOICES', ())).get(value)
+        if label:
+            return label
+    return value
+
+
+def get_facets(kind, model=None):
+    """
+    Return [{'value', 'label', 'count'}, ...] for `kind` ('tag' or
+    'category'), most used first, for one page type (model or 'app.Model'
+    label) or summed over all of them. Served from the shared cache.
+    """
+    from home.models import ListingFacet
+
+    if isinstance(model, str):
+        model = apps.get_model(model)
+
+    key = 'facets:{}:{}:{}'.format(get_generation('facets'), model._meta.label if model else '*', kind)
+    facets = cache.get(key)
+    if facets is None:
+        queryset = ListingFacet.objects.filter(kind=kind, count__gt=0)
+        if model is not None:
+            queryset = queryset.filter(content_type=ContentType.objects.get_for_model(model))
+        rows = queryset.values('value').annotate(total=Sum('count')).order_by('-total', 'value')
+
+        models = [model] if model is not None else faceted_models()
+        facets = []
+        for row in rows:
+            label = category_label(models, row['value']) if kind == 'category' else row['value']
+            facets.append({'value': row['value'], 'label': label, 'count': row['total']})
+        cache.set(key, facets, settings.YONION_FACET_CACHE_TIMEOUT)
+    return facets
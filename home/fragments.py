@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 10:40
+
+from home.generations import bump_generation, get_generations
+
+# Home page section -> generation it is rendered from. The banner reuses the
+# wallpaper registry's generation; the listing sections are bumped by the page
+# signals in `home.signals`.
+HOME_SECTIONS = (
+    ('wallpapers', 'wallpaper'),
+    ('courses', 'home:courses'),
+    ('mentors', 'home:mentors'),
+    ('trainees', 'home:trainees'),
+)
+
+
+def get_section_versions():
+    generations = get_generations(*[generation for section, generation in HOME_SECTIONS])
+    return dict(zip([section for section, generation in HOME_SECTIONS], generations))
+
+
+def bump_section(section):
+    bump_generation(dict(HOME_SECTIONS)[section])
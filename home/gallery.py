@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 11:20
+
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+
+# Gallery rows loaded by `prefetch_gallery_images`, ordered by sort_order.
+GALLERY_ATTR = '_yonion_gallery_images'
+
+
+def gallery_items(page, related_name='gallery_images'):
+    """
+    Return the ordered gallery rows of `page`, using the rows attached by
+    `prefetch_gallery_images` when the page came from a listing.
+    """
+    items = page.__dict__.get(GALLERY_ATTR)
+    if items is None:
+        items = list(getattr(page, related_name).all())
+    return items
+
+
+def first_gallery_item(page, related_name='gallery_images'):
+    items = page.__dict__.get(GALLERY_ATTR)
+    if items is None:
+        return getattr(page, related_name).first()
+    return items[0] if items else None
+
+
+def prefetch_gallery_images(pages, related_name='gallery_images'):
+    """
+    Load the gallery rows and their images for a whole page of results, one
+    query per page type, so `thumbnail_image`/`main_image` on each card do
+    not query again.
+    """
+    pages = list(pages)
+
+    by_model = defaultdict(list)
+    for page in pages:
+        by_model[type(page)].append(page)
+
+    for model, model_pages in by_model.items():
+        try:
+            relation = model._meta.get_field(related_name)
+        except FieldDoesNotExist:
+            continue
+
+        items = defaultdict(list)
+        for item in (relation.related_model.objects
+                     .filter(page__in=[page.pk for page in model_pages])
+                     .select_related('image')
+                     .order_by('page_id', 'sort_order')):
+            items[item.page_id].append(item)
+
+        for page in model_pages:
+            page.__dict__[GALLERY_ATTR] = items[page.pk]
+
+    return pages
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 10:40
+
+import time
+
+from django.core.cache import cache
+
+# Generation counters live in the shared cache without expiry. Cached data is
+# keyed by the current generation of whatever it was built from, so bumping a
+# counter invalidates every worker's copy at once.
+
+
+def get_generations(*names):
+    keys = ['generation:{}'.format(name) for name in names]
+    found = cache.get_many(keys)
+    generations = []
+    for key in keys:
+        generation = found.get(key)
+        if generation is None:
+            cache.add(key, int(time.time()), None)
+            generation = cache.get(key)
+        generations.append(generation)
+    return generations
+
+
+def get_generation(name):
+    return get_generations(name)[0]
+
+
+def bump_generation(name):
+    # Returns the new generation
+    key = 'generation:{}'.format(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        generation = int(time.time())
+        cache.set(key, generation, None)
+        return generation
+
+
+# Journals: what changed, not only that something did. Each entry is a list
+# of items under its own key, numbered by the journal's generation; a process
+# remembers the last entry it applied and reads the ones after it.
+
+
+def append_journal(name, items, timeout):
+    entry = bump_generation(name)
+    cache.set('{}:{}'.format(name, entry), list(items), timeout)
+
+
+def read_journal(name, since, until):
+    """
+    Return the items of the entries after `since` up to `until`, or None
+    when one of them is missing (evicted, expired or still being written):
+    the journal is lost and the reader must rebuild whatever it keeps from
+    scratch, then read on from `until`.
+    """
+    keys = ['{}:{}'.format(name, entry) for entry in range(since + 1, until + 1)]
+    found = cache.get_many(keys)
+    if len(found) < len(keys):
+        return None
+    return [item for key in keys for item in found[key]]
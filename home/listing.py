@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 13:10
+
+import hashlib
+import math
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from home.gallery import prefetch_gallery_images
+from home.generations import get_generation
+
+CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def listing_generation_name(model):
+    # Bumped by `home.signals` whenever a page of this type is saved or deleted
+    return 'listing:{}'.format(model._meta.label_lower)
+
+
+def page_id_column():
+    # wagtailcore_page.id itself: ordering by `pk`/`id` on a page subclass is
+    # rewritten by the ORM to the child table's page_ptr_id, which no index on
+    # wagtailcore_page can cover.
+    from wagtail.core.models import Page
+
+    quote = connection.ops.quote_name
+    return RawSQL('{}.{}'.format(quote(Page._meta.db_table), quote('id')), [])
+
+
+def encode_cursor(page):
+    return '{}_{}'.format(page.first_published_at.strftime(CURSOR_FORMAT), page.pk)
+
+
+def decode_cursor(value):
+    try:
+        timestamp, pk = value.split('_')
+        return datetime.strptime(timestamp, CURSOR_FORMAT), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+class ListingPage(object):
+    """
+    One page of a listing. Quacks like django.core.paginator.Page for the
+    templates, plus `next_cursor`/`previous_cursor` for keyset links.
+    """
+
+    def __init__(self, object_list, number, paginator, has_more):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_more = has_more
+
+    def __repr__(self):
+        return '<ListingPage {} of {}>'.format(self.number, self.paginator.num_pages)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_more
+
+    def has_previous(self):
+        return self.number > 1
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+    @property
+    def next_cursor(self):
+        if self._has_more and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return ''
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return ''
+
+
+class ListingPaginator(object):
+    """
+    Keyset pagination over live pages, newest first, on
+    (first_published_at, id).
+
+    Pages reached through a cursor (`?after=` / `?before=`) are a single
+    index range scan no matter how deep they are. Plain `?page=N` links use
+    the page boundary remembered when page N-1 was served, and only fall back
+    to OFFSET for a cold jump. The total is a cached COUNT(*), refreshed when
+    a page of the listed type changes or after YONION_LISTING_COUNT_TIMEOUT.
+    """
+
+    def __init__(self, queryset, per_page):
+        # Pages published through wagtail always carry first_published_at;
+        # rows without one cannot be placed on the keyset and are left out.
+        # Sorted to match the (live, first_published_at, id) index that
+        # home/migrations/0006 adds to wagtailcore_page.
+        self.queryset = (queryset.live()
+                         .filter(first_published_at__isnull=False)
+                         .order_by('-first_published_at', page_id_column().desc()))
+        self.per_page = per_page
+
+        signature = hashlib.md5(str(self.queryset.query).encode('utf-8')).hexdigest()
+        generation = get_generation(listing_generation_name(self.queryset.model))
+        self.cache_prefix = 'listing:{}:{}:{}'.format(signature, generation, per_page)
+
+    @property
+    def count(self):
+        if not hasattr(self, '_count'):
+            key = self.cache_prefix + ':count'
+            self._count = cache.get(key)
+            if self._count is None:
+                self._count = self.queryset.count()
+                cache.set(key, self._count, settings.YONION_LISTING_COUNT_TIMEOUT)
+        return self._count
+
+    @property
+    def num_pages(self):
+        return max(1, int(math.ceil(self.count / float(self.per_page))))
+
+    @property
+    def page_range(self):
+        return range(1, self.num_pages + 1)
+
+    def _boundary_key(self, number):
+        return '{}:page:{}'.format(self.cache_prefix, number)
+
+    def page(self, number, after=None, before=None):
+        try:
+            number = max(1, int(number))
+        except (TypeError, ValueError):
+            number = 1
+
+        after = decode_cursor(after) if after else None
+        before = decode_cursor(before) if before else None
+        if after is None and before is None and number > 1:
+            after = cache.get(self._boundary_key(number))
+
+        if after is not None:
+            published, pk = after
+            queryset = self.queryset.filter(
+                Q(first_published_at__lt=published) | Q(first_published_at=published, pk__lt=pk))
+            objects = list(queryset[:self.per_page + 1])
+            has_more = len(objects) > self.per_page
+        elif before is not None:
+            published, pk = before
+            queryset = self.queryset.filter(
+                Q(first_published_at__gt=published) | Q(first_published_at=published, pk__gt=pk))
+            objects = list(queryset.order_by('first_published_at', page_id_column().asc())[:self.per_page])
+            objects.reverse()
+            has_more = True
+        else:
+            # Cold jump: clamp to the last page like the old Paginator blocks did
+            number = min(number, self.num_pages)
+            offset = (number - 1) * self.per_page
+            objects = list(self.queryset[offset:offset + self.per_page + 1])
+            has_more = len(objects) > self.per_page
+
+        objects = prefetch_gallery_images(objects[:self.per_page])
+
+        if objects and has_more:
+            last = objects[-1]
+            cache.set(self._boundary_key(number + 1), (last.first_published_at, last.pk),
+                      settings.YONION_LISTING_COUNT_TIMEOUT)
+
+        return ListingPage(objects, number, self, has_more)
+
+
+def paginate_listing(request, queryset, per_page):
+    """
+    Shared pagination for the tag and index listing pages. Reads `page`,
+    `after` and `before` from the query string.
+    """
+    paginator = ListingPaginator(queryset, per_page)
+    return paginator.page(
+        request.GET.get('page', 1),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 15:20
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from home.facets import faceted_models
+from home.listing import ListingPaginator
+
+# Plan fragments that mean a listing filter is not served by an index;
+# MySQL plans are read as JSON, see mysql_plan_problems()
+PLAN_WARNINGS = {
+    'sqlite': ('SCAN TABLE', 'USE TEMP B-TREE'),
+    'postgresql': ('Seq Scan', 'Sort Method'),
+}
+
+
+def mysql_plan_problems(plan):
+    """
+    Full table scans (access_type ALL), filesorts and temporary tables in
+    a MySQL `EXPLAIN FORMAT=JSON` plan.
+    """
+    problems = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if node.get('access_type') == 'ALL':
+                problems.append('full scan of {}'.format(node.get('table_name')))
+            if node.get('using_filesort'):
+                problems.append('Using filesort')
+            if node.get('using_temporary_table'):
+                problems.append('Using temporary')
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(json.loads(plan))
+    return problems
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the listing queries behind ?tag= / ?cate= and the keyset pagination'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--per-page', type=int, default=9)
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every plan, not only the failing ones')
+
+    def listing_shapes(self, model):
+        label = model._meta.label
+        per_page = self.per_page
+
+        tag = model.tags.through.objects.values_list('tag__name', flat=True).first() or '默认'
+        category = model._meta.get_field('category').default
+
+        base = ListingPaginator(model.objects.all(), per_page).queryset
+        by_tag = ListingPaginator(model.objects.filter(tags__name=tag), per_page).queryset
+        by_category = ListingPaginator(model.objects.filter(category=category), per_page).queryset
+        both = ListingPaginator(model.objects.filter(tags__name=tag, category=category), per_page).queryset
+        after = {'first_published_at__lt': timezone.now()}
+
+        return [
+            ('{} all'.format(label), base[:per_page + 1]),
+            ('{} ?tag='.format(label), by_tag[:per_page + 1]),
+            ('{} ?cate='.format(label), by_category[:per_page + 1]),
+            ('{} ?tag=&cate='.format(label), both[:per_page + 1]),
+            ('{} keyset seek'.format(label), base.filter(**after)[:per_page + 1]),
+            ('{} ?tag= keyset seek'.format(label), by_tag.filter(**after)[:per_page + 1]),
+        ]
+
+    def explain(self, queryset):
+        # Returns (plan, problems)
+        if connection.vendor == 'mysql':
+            # The default (tabular) output has no field names to match on
+            plan = queryset.explain(format='json')
+            return plan, mysql_plan_problems(plan)
+        plan = queryset.explain()
+        return plan, [warning for warning in PLAN_WARNINGS.get(connection.vendor, ()) if warning in plan]
+
+    def handle(self, *args, **options):
+        self.per_page = options['per_page']
+
+        failing = []
+        for model in faceted_models():
+            for name, queryset in self.listing_shapes(model):
+                plan, problems = self.explain(queryset)
+                if problems or options['verbose_plans']:
+                    self.stdout.write('== {}\n{}\n'.format(name, plan))
+                if problems:
+                    failing.append('{} ({})'.format(name, ', '.join(problems)))
+                else:
+                    self.stdout.write('ok  {}'.format(name))
+
+        if failing:
+            raise CommandError('Listing queries not served by an index:\n  ' + '\n  '.join(failing))
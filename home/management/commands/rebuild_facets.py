@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 14:30
+
+from django.core.management.base import BaseCommand
+
+from home.facets import faceted_models, refresh_facets
+
+
+class Command(BaseCommand):
+    help = 'Recount the tag and category facets of every listed page type'
+
+    def handle(self, *args, **options):
+        for model in faceted_models():
+            refresh_facets(model)
+            self.stdout.write('Rebuilt facets for {}'.format(model._meta.label))
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 15:50
+
+from django.core.management.base import BaseCommand
+
+from home.models import CourseRecommendation
+from home.recommendations import refresh_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Recompute the recommended courses of every listed page'
+
+    def handle(self, *args, **options):
+        refresh_recommendations()
+        self.stdout.write('Rebuilt {} course recommendations'.format(CourseRecommendation.objects.count()))
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.1 on 2026-10-18 14:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('home', '0004_auto_20190530_1317'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tag', '标签'), ('category', '类别')], max_length=16, verbose_name='类型')),
+                ('value', models.CharField(max_length=100, verbose_name='取值')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='页面数')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType', verbose_name='页面类型')),
+            ],
+            options={
+                'verbose_name': '列表筛选统计',
+                'verbose_name_plural': '列表筛选统计',
+                'unique_together': {('content_type', 'kind', 'value')},
+            },
+        ),
+    ]
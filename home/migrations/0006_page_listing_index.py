@@ -0,0 +1,27 @@
+# Generated by Django 2.2.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+# wagtailcore_page belongs to wagtail, so the index used by the keyset
+# listings (home.listing) is created through the schema editor directly.
+PAGE_LISTING_INDEX = models.Index(fields=['live', 'first_published_at', 'id'], name='yonion_page_listing_idx')
+
+
+def add_page_listing_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('wagtailcore', 'Page'), PAGE_LISTING_INDEX)
+
+
+def remove_page_listing_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('wagtailcore', 'Page'), PAGE_LISTING_INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('home', '0005_listingfacet'),
+        ('wagtailcore', '0041_group_collection_permissions_verbose_name_plural'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_page_listing_index, remove_page_listing_index),
+    ]
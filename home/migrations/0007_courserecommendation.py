@@ -0,0 +1,30 @@
+# Generated by Django 2.2.1 on 2026-10-18 15:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0041_group_collection_permissions_verbose_name_plural'),
+        ('course', '0007_listing_indexes'),
+        ('home', '0006_page_listing_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRecommendation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.PositiveIntegerField(default=0, verbose_name='相关度')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='course.CoursePage', verbose_name='推荐课程')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page', verbose_name='页面')),
+            ],
+            options={
+                'verbose_name': '课程推荐',
+                'verbose_name_plural': '课程推荐',
+                'unique_together': {('page', 'course')},
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 2.2.1 on 2026-10-18 22:40
+
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+FACETED_PAGE_TYPES = (
+    ('course', 'CoursePage'),
+    ('mentor', 'MentorPage'),
+    ('trainee', 'TraineePage'),
+    ('news', 'NewsPage'),
+)
+
+
+def count_facets(apps, schema_editor):
+    # Same as `manage.py rebuild_facets`, with the historical models
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ListingFacet = apps.get_model('home', 'ListingFacet')
+    PageFacet = apps.get_model('home', 'PageFacet')
+    for app_label, model_name in FACETED_PAGE_TYPES:
+        model = apps.get_model(app_label, model_name)
+        through = apps.get_model(app_label, model_name + 'Tag')
+        content_type, created = ContentType.objects.get_or_create(app_label=app_label, model=model_name.lower())
+
+        facets = set()
+        for pk, category in model.objects.filter(live=True).values_list('pk', 'category'):
+            if category:
+                facets.add((pk, 'category', category))
+        for pk, name in through.objects.filter(content_object__live=True).values_list('content_object_id', 'tag__name'):
+            facets.add((pk, 'tag', name))
+        counts = Counter((kind, value) for pk, kind, value in facets)
+
+        PageFacet.objects.bulk_create(
+            [PageFacet(page_id=pk, kind=kind, value=value) for pk, kind, value in facets], batch_size=500)
+        ListingFacet.objects.filter(content_type=content_type).delete()
+        ListingFacet.objects.bulk_create(
+            [ListingFacet(content_type=content_type, kind=kind, value=value, count=count)
+             for (kind, value), count in counts.items()])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wagtailcore', '0041_group_collection_permissions_verbose_name_plural'),
+        ('course', '0007_listing_indexes'),
+        ('mentor', '0005_listing_indexes'),
+        ('news', '0005_listing_indexes'),
+        ('trainee', '0005_listing_indexes'),
+        ('home', '0007_courserecommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageFacet',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('tag', '标签'), ('category', '类别')], max_length=16, verbose_name='类型')),
+                ('value', models.CharField(max_length=100, verbose_name='取值')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page', verbose_name='页面')),
+            ],
+            options={
+                'verbose_name': '页面筛选项',
+                'verbose_name_plural': '页面筛选项',
+                'unique_together': {('page', 'kind', 'value')},
+            },
+        ),
+        migrations.RunPython(count_facets, migrations.RunPython.noop),
+    ]
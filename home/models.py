@@ -1,3 +1,7 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
@@ -7,8 +11,10 @@ from wagtail.core.models import Page, Orderable
 from wagtail.core.fields import RichTextField
 from wagtail.admin.edit_handlers import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.images.edit_handlers import ImageChooserPanel
-from wagtail.images.models import Image
-from taggit.models import Tag
+from home.facets import get_facets
+from home.fragments import get_section_versions
+from home.gallery import prefetch_gallery_images
+from home.wallpapers import get_wallpapers
 from wagtail.search import index
 
 from wagtail.core.models import Page
@@ -24,15 +30,18 @@ class HomePage(Page):
         verbose_name_plural = verbose_name
 
     def get_context(self, request):
-        # Update context to include only published posts, ordered by reverse-chron
+        # Update context to include only published posts, ordered by reverse-chron.
+        # The listings below stay lazy (querysets or callables the template calls):
+        # home_page.html renders each section inside a {% cache %} block keyed by
+        # section_versions, so they only hit the database when a section is rebuilt.
         context = super().get_context(request)
-        tags = Tag.objects.all().order_by('name')
+        tags = partial(get_facets, 'tag')
         course4mentor = CoursePage.objects.filter(tags__name='师资培训').order_by('-first_published_at')[:3]
         course4trainee = CoursePage.objects.filter(tags__name='名师工作坊').order_by('-first_published_at')[:3]
-        coursepages = CoursePage.objects.filter(tags__name='首页展示').order_by('-first_published_at')[:3]
-        mentorpages = MentorPage.objects.filter(tags__name='首页展示').order_by('-first_published_at')[:4]
-        traineepages = TraineePage.objects.filter(category='story').order_by('-first_published_at')[:6]
-        wallpapers = Image.objects.filter(tags__name="首页壁纸").order_by('-created_at')[:3]
+        coursepages = partial(prefetch_gallery_images, CoursePage.objects.filter(tags__name='首页展示').order_by('-first_published_at')[:3])
+        mentorpages = partial(prefetch_gallery_images, MentorPage.objects.filter(tags__name='首页展示').order_by('-first_published_at')[:4])
+        traineepages = partial(prefetch_gallery_images, TraineePage.objects.filter(category='story').order_by('-first_published_at')[:6])
+        wallpapers = partial(get_wallpapers, "首页壁纸", 3)
 
         context['tags'] = tags
         context['course4mentor'] = course4mentor
@@ -41,8 +50,63 @@ class HomePage(Page):
         context['mentorpages'] = mentorpages
         context['traineepages'] = traineepages
         context['wallpapers'] = wallpapers
+        context['section_versions'] = get_section_versions()
+        context['fragment_timeout'] = settings.YONION_HOME_FRAGMENT_TIMEOUT
         return context
 
     content_panels = Page.content_panels + [
         FieldPanel('body', classname="full"),
     ]
+
+
+class ListingFacet(models.Model):
+    """
+    Live page count per tag / category of a page type, maintained by
+    `home.facets` so sidebars and tag clouds do not scan the tag tables.
+    """
+    KIND_CHOICES = (
+        ('tag', '标签'),
+        ('category', '类别'),
+    )
+    content_type = models.ForeignKey(ContentType, verbose_name='页面类型', on_delete=models.CASCADE)
+    kind = models.CharField('类型', choices=KIND_CHOICES, max_length=16)
+    value = models.CharField('取值', max_length=100)
+    count = models.PositiveIntegerField('页面数', default=0)
+
+    class Meta:
+        unique_together = ('content_type', 'kind', 'value')
+        verbose_name = '列表筛选统计'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return '{}:{}({})'.format(self.kind, self.value, self.count)
+
+
+class PageFacet(models.Model):
+    """
+    The tags and category a live page is counted under in `ListingFacet`,
+    so a publish only moves the counts by what changed for that page.
+    """
+    page = models.ForeignKey(Page, verbose_name='页面', on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField('类型', choices=ListingFacet.KIND_CHOICES, max_length=16)
+    value = models.CharField('取值', max_length=100)
+
+    class Meta:
+        unique_together = ('page', 'kind', 'value')
+        verbose_name = '页面筛选项'
+        verbose_name_plural = verbose_name
+
+
+class CourseRecommendation(models.Model):
+    """
+    Courses related to a page through shared tags (and category, for course
+    pages), precomputed by `home.recommendations` when pages are published.
+    """
+    page = models.ForeignKey(Page, verbose_name='页面', on_delete=models.CASCADE, related_name='+')
+    course = models.ForeignKey(CoursePage, verbose_name='推荐课程', on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField('相关度', default=0)
+
+    class Meta:
+        unique_together = ('page', 'course')
+        verbose_name = '课程推荐'
+        verbose_name_plural = verbose_name
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 15:50
+
+import hashlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Sum
+
+from home.facets import faceted_models
+from home.gallery import prefetch_gallery_images
+from home.generations import bump_generation, get_generation
+
+# A shared tag weighs more than a shared course category
+TAG_WEIGHT = 2
+CATEGORY_WEIGHT = 1
+
+
+def _course_model():
+    from course.models import CoursePage
+    return CoursePage
+
+
+def _page_profiles(model, queryset):
+    """
+    Return {pk: (category, {tag_id, ...})} for the live pages of `queryset`,
+    with two queries and without loading the pages themselves.
+    """
+    categories = dict(queryset.live().order_by().values_list('pk', 'category'))
+    tags = defaultdict(set)
+    for pk, tag_id in (model.tags.through.objects
+                       .filter(content_object__in=list(categories))
+                       .values_list('content_object_id', 'tag_id')):
+        tags[pk].add(tag_id)
+    return {pk: (category, tags[pk]) for pk, category in categories.items()}
+
+
+def _candidates():
+    CoursePage = _course_model()
+    courses = CoursePage.objects.filter(category=settings.YONION_RECOMMENDATION_CATEGORY)
+    published = dict(courses.live().order_by().values_list('pk', 'first_published_at'))
+    return [(pk, category, tags, published[pk])
+            for pk, (category, tags) in _page_profiles(CoursePage, courses).items()]
+
+
+def _score(model, pk, category, tags, candidates):
+    CoursePage = _course_model()
+    scored = []
+    for course_pk, course_category, course_tags, published in candidates:
+        if course_pk == pk:
+            continue
+        score = TAG_WEIGHT * len(tags & course_tags)
+        if model is CoursePage and category == course_category:
+            score += CATEGORY_WEIGHT
+        if score:
+            scored.append((score, published, course_pk))
+    scored.sort(key=lambda item: (item[0], item[1] is not None, item[1]), reverse=True)
+    return scored[:settings.YONION_RECOMMENDATION_COUNT]
+
+
+def refresh_recommendations(pks=None):
+    """
+    Recompute the recommended courses of the given pages (all listed pages
+    when `pks` is None). Pages that are no longer live lose their rows.
+    """
+    from home.models import CourseRecommendation
+
+    candidates = _candidates()
+    rows = []
+    for model in faceted_models():
+        queryset = model.objects.all() if pks is None else model.objects.filter(pk__in=pks)
+        for pk, (category, tags) in _page_profiles(model, queryset).items():
+            for score, published, course_pk in _score(model, pk, category, tags, candidates):
+                rows.append(CourseRecommendation(page_id=pk, course_id=course_pk, score=score))
+
+    with transaction.atomic():
+        stale = CourseRecommendation.objects.all()
+        if pks is not None:
+            stale = stale.filter(page__in=pks)
+        stale.delete()
+        CourseRecommendation.objects.bulk_create(rows)
+    bump_generation('recommend')
+
+
+def affected_pages(page):
+    """
+    Return the pks of the pages whose recommendations depend on `page`:
+    the page itself and, for a course, every page sharing a tag with it,
+    the courses of its category (category bonus) and the pages that
+    recommended it so far. Read it before a delete cascades.
+    """
+    from home.models import CourseRecommendation
+
+    CoursePage = _course_model()
+    pks = {page.pk}
+    if isinstance(page, CoursePage):
+        tag_ids = list(page.tags.through.objects.filter(content_object=page).values_list('tag_id', flat=True))
+        for model in faceted_models():
+            pks.update(model.tags.through.objects
+                       .filter(tag__in=tag_ids)
+                       .values_list('content_object_id', flat=True))
+        if page.category == settings.YONION_RECOMMENDATION_CATEGORY:
+            pks.update(CoursePage.objects.live().filter(category=page.category).values_list('pk', flat=True))
+        pks.update(CourseRecommendation.objects.filter(course=page).values_list('page_id', flat=True))
+    return pks
+
+
+def refresh_page_recommendations(page, pks=None):
+    """
+    Incremental refresh after `page` was published, unpublished or deleted,
+    of the `affected_pages` (pass them when read before a delete).
+    """
+    refresh_recommendations(affected_pages(page) if pks is None else pks)
+
+
+def _default_course_ids(limit, exclude=()):
+    CoursePage = _course_model()
+    return list(CoursePage.objects.live()
+                .filter(category=settings.YONION_RECOMMENDATION_CATEGORY)
+                .exclude(pk__in=exclude)
+                .order_by('-first_published_at')
+                .values_list('pk', flat=True)[:limit])
+
+
+def get_recommendations(pages=()):
+    """
+    Return the courses to show under "猜你喜欢" for the pages on screen: the
+    best summed scores of their precomputed recommendations, topped up with
+    the newest courses of the recommended category. The ranking is cached.
+    """
+    from home.models import CourseRecommendation
+
+    CoursePage = _course_model()
+    limit = settings.YONION_RECOMMENDATION_COUNT
+    pks = sorted(page.pk for page in pages)
+
+    signature = hashlib.md5(','.join(map(str, pks)).encode('utf-8')).hexdigest()
+    key = 'recommend:{}:{}'.format(get_generation('recommend'), signature)
+    # Only the ids are cached: StreamField pages do not pickle
+    course_ids = cache.get(key)
+    if course_ids is None:
+        course_ids = []
+        if pks:
+            course_ids = list(CourseRecommendation.objects
+                              .filter(page__in=pks, course__live=True)
+                              .exclude(course__in=pks)
+                              .values('course')
+                              .annotate(total=Sum('score'))
+                              .order_by('-total', 'course')
+                              .values_list('course', flat=True)[:limit])
+        if len(course_ids) < limit:
+            course_ids += _default_course_ids(limit - len(course_ids), exclude=course_ids + pks)
+        cache.set(key, course_ids, settings.YONION_RECOMMENDATION_CACHE_TIMEOUT)
+
+    found = CoursePage.objects.live().in_bulk(course_ids)
+    return prefetch_gallery_images(found[pk] for pk in course_ids if pk in found)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 09:30
+
+import os
+from io import BytesIO
+
+from django.core.files import File
+from wagtail.images.models import Filter, SourceImageIOError
+from wagtail.images.shortcuts import get_rendition_or_not_found
+
+# Renditions resolved for an image are kept on the instance itself, so they
+# travel with it through pickling into the shared cache.
+RENDITIONS_ATTR = '_yonion_renditions'
+
+# Same mapping wagtail uses when naming rendition files
+FORMAT_EXTENSIONS = {
+    'jpeg': '.jpg',
+    'png': '.png',
+    'gif': '.gif',
+}
+
+
+def get_cached_rendition(image, filter):
+    """
+    Return the rendition of `image` for `filter`, looking at the renditions
+    already attached to the instance before going to the database.
+    """
+    if isinstance(filter, str):
+        filter = Filter(spec=filter)
+
+    renditions = image.__dict__.setdefault(RENDITIONS_ATTR, {})
+    rendition = renditions.get(filter.spec)
+    if rendition is None:
+        rendition = get_rendition_or_not_found(image, filter)
+        renditions[filter.spec] = rendition
+    return rendition
+
+
+def _not_found_rendition(image, Rendition):
+    # Mirrors wagtail.images.shortcuts.get_rendition_or_not_found
+    rendition = Rendition(image=image, width=0, height=0)
+    rendition.file.name = 'not-found'
+    return rendition
+
+
+def _build_rendition(image, filter, cache_key, Rendition):
+    generated_image = filter.run(image, BytesIO())
+
+    # Name the file the way AbstractImage.get_rendition does
+    input_filename = os.path.basename(image.file.name)
+    input_filename_without_extension, input_extension = os.path.splitext(input_filename)
+    output_extension = filter.spec.replace('|', '.') + FORMAT_EXTENSIONS[generated_image.format_name]
+    if cache_key:
+        output_extension = cache_key + '.' + output_extension
+    output_filename_without_extension = input_filename_without_extension[:(59 - len(output_extension))]
+    output_filename = output_filename_without_extension + '.' + output_extension
+
+    return Rendition(
+        image=image,
+        filter_spec=filter.spec,
+        focal_point_key=cache_key,
+        file=File(generated_image.f, name=output_filename),
+    )
+
+
+def prefetch_renditions(images, *filter_specs):
+    """
+    Resolve `filter_specs` for a batch of images: existing renditions are read
+    with a single query and the missing ones are generated and inserted with a
+    single bulk insert. The renditions are attached to the instances for
+    `get_cached_rendition` / `{% cached_image %}`.
+    """
+    images = [image for image in images if image]
+    filters = [Filter(spec=spec) for spec in filter_specs]
+    if not images or not filters:
+        return images
+
+    wanted = {}
+    for image in images:
+        renditions = image.__dict__.setdefault(RENDITIONS_ATTR, {})
+        for filter in filters:
+            if filter.spec not in renditions:
+                key = (image.pk, filter.spec, filter.get_cache_key(image))
+                wanted.setdefault(key, []).append((image, filter))
+    if not wanted:
+        return images
+
+    Rendition = images[0].get_rendition_model()
+    found = {}
+    for rendition in Rendition.objects.filter(
+            image_id__in={key[0] for key in wanted},
+            filter_spec__in={key[1] for key in wanted}):
+        found[(rendition.image_id, rendition.filter_spec, rendition.focal_point_key)] = rendition
+
+    missing = []
+    for key, requests in wanted.items():
+        if key in found:
+            continue
+        image, filter = requests[0]
+        try:
+            rendition = _build_rendition(image, filter, key[2], Rendition)
+            missing.append(rendition)
+        except SourceImageIOError:
+            rendition = _not_found_rendition(image, Rendition)
+        found[key] = rendition
+
+    if missing:
+        # A concurrent request may have created some of them meanwhile; its
+        # row wins and ours is only used for this response.
+        Rendition.objects.bulk_create(missing, ignore_conflicts=True)
+
+    for key, requests in wanted.items():
+        rendition = found[key]
+        for image, filter in requests:
+            # Keep `rendition.alt` (image.title) from querying the image again
+            rendition.image = image
+            image.__dict__[RENDITIONS_ATTR][filter.spec] = rendition
+
+    return images
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 09:30
+
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+from wagtail.core.models import Page
+from wagtail.core.signals import page_published, page_unpublished
+from wagtail.images.models import Image
+
+from course.models import CoursePage
+from home.facets import delete_tag_facets, faceted_models, rename_tag_facets, update_page_facets
+from home.fragments import bump_section
+from home.generations import bump_generation
+from home.listing import listing_generation_name
+from home.recommendations import affected_pages, refresh_page_recommendations, refresh_recommendations
+from home.wallpapers import wallpaper_registry
+from mentor.models import MentorPage
+from trainee.models import TraineePage
+
+# Publishing, unpublishing, moving and tagging a page all end in page.save(),
+# so post_save/post_delete are enough to keep the home page sections fresh.
+HOME_SECTION_MODELS = (
+    (CoursePage, 'courses'),
+    (MentorPage, 'mentors'),
+    (TraineePage, 'trainees'),
+)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def invalidate_image_caches(sender, **kwargs):
+    wallpaper_registry.invalidate()
+    # Replacing an image file drops its renditions, which the listing
+    # sections of the home page link to.
+    for model, section in HOME_SECTION_MODELS:
+        bump_section(section)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def invalidate_wallpapers_on_retag(sender, instance, action, **kwargs):
+    if isinstance(instance, Image) and action in ('post_add', 'post_remove', 'post_clear'):
+        wallpaper_registry.invalidate()
+
+
+def _connect_home_section(model, section):
+    def invalidate_home_section(sender, **kwargs):
+        bump_section(section)
+
+    post_save.connect(invalidate_home_section, sender=model, weak=False)
+    post_delete.connect(invalidate_home_section, sender=model, weak=False)
+
+
+for model, section in HOME_SECTION_MODELS:
+    _connect_home_section(model, section)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_listing_totals(sender, instance, **kwargs):
+    if isinstance(instance, Page):
+        # Base Page listings (get_children()) count every page type
+        for model in [type(instance)] + type(instance)._meta.get_parent_list():
+            bump_generation(listing_generation_name(model))
+
+
+# Tag changes on a page are committed by page.save() inside publishing, so
+# page_published sees them; draft edits do not change the live counts.
+def _connect_facets(model):
+    def add_facets(sender, instance, **kwargs):
+        update_page_facets(model, instance.pk)
+        refresh_page_recommendations(instance)
+
+    def remove_facets(sender, instance, **kwargs):
+        # Also sent by wagtail for a live page about to be deleted, which is
+        # still live in the database: don't read it back
+        update_page_facets(model, instance.pk, live=False)
+        refresh_page_recommendations(instance)
+
+    def remove_deleted_page_facets(sender, instance, **kwargs):
+        # Before the delete cascades to the page's PageFacet, tag and
+        # CourseRecommendation rows
+        update_page_facets(model, instance.pk, live=False)
+        instance._recommendation_pages = affected_pages(instance)
+
+    def refresh_deleted_page_recommendations(sender, instance, **kwargs):
+        refresh_page_recommendations(instance, getattr(instance, '_recommendation_pages', None))
+
+    page_published.connect(add_facets, sender=model, weak=False)
+    page_unpublished.connect(remove_facets, sender=model, weak=False)
+    pre_delete.connect(remove_deleted_page_facets, sender=model, weak=False)
+    post_delete.connect(refresh_deleted_page_recommendations, sender=model, weak=False)
+
+
+for model in faceted_models():
+    _connect_facets(model)
+
+
+@receiver(pre_save, sender=Tag)
+def remember_tag_name(sender, instance, raw=False, **kwargs):
+    instance._old_name = None
+    if instance.pk and not raw:
+        instance._old_name = Tag.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+@receiver(post_save, sender=Tag)
+def rename_tag(sender, instance, created, **kwargs):
+    # New tags are counted when a page using them is published
+    old_name = getattr(instance, '_old_name', None)
+    if old_name and old_name != instance.name:
+        rename_tag_facets(old_name, instance.name)
+
+
+@receiver(post_delete, sender=Tag)
+def delete_tag(sender, instance, **kwargs):
+    delete_tag_facets(instance.name)
+    refresh_recommendations()
@@ -5,6 +5,10 @@
 
 from django import template
 from urllib import parse
+from wagtail.images.templatetags.wagtailimages_tags import ImageNode, image
+
+from home.facets import get_facets
+from home.renditions import get_cached_rendition, prefetch_renditions
 
 register = template.Library()
 
@@ -20,3 +24,110 @@ def contains(url, val):
 @register.filter()
 def widget_with_classes(value, arg):
     return value.as_widget(attrs={'class': arg})
+
+
+@register.simple_tag()
+def listing_facets(model, kind='tag'):
+    """
+    {% listing_facets "course.CoursePage" "tag" as tags %} gives the used tags
+    of a page type with their live page counts, most used first. Rendered
+    by the tag index pages through home/listing_facets.html.
+    """
+    return get_facets(kind, model or None)
+
+
+class CachedImageNode(ImageNode):
+    def render(self, context):
+        try:
+            image = self.image_expr.resolve(context)
+        except template.VariableDoesNotExist:
+            return ''
+
+        if not image:
+            return ''
+
+        rendition = get_cached_rendition(image, self.filter)
+
+        if self.output_var_name:
+            context[self.output_var_name] = rendition
+            return ''
+
+        resolved_attrs = {}
+        for key in self.attrs:
+            resolved_attrs[key] = self.attrs[key].resolve(context)
+        return rendition.img_tag(resolved_attrs)
+
+
+@register.tag(name='cached_image')
+def cached_image(parser, token):
+    """
+    Same syntax as wagtail's `{% image %}`, but reuses renditions already
+    attached to the image instance (see `home.renditions`).
+    """
+    node = image(parser, token)
+    return CachedImageNode(node.image_expr, node.filter_spec, output_var_name=node.output_var_name, attrs=node.attrs)
+
+
+class PrefetchRenditionsNode(template.Node):
+    def __init__(self, objects_expr, filter_specs, image_attr=None, output_var_name=None):
+        self.objects_expr = objects_expr
+        self.filter_specs = filter_specs
+        self.image_attr = image_attr
+        self.output_var_name = output_var_name
+
+    def resolve_image(self, obj):
+        if self.image_attr is None:
+            return obj
+        value = getattr(obj, self.image_attr, None)
+        return value() if callable(value) else value
+
+    def render(self, context):
+        try:
+            objects = list(self.objects_expr.resolve(context) or [])
+        except template.VariableDoesNotExist:
+            objects = []
+
+        prefetch_renditions([self.resolve_image(obj) for obj in objects], *self.filter_specs)
+
+        if self.output_var_name:
+            context[self.output_var_name] = objects
+        return ''
+
+
+@register.tag(name='prefetch_renditions')
+def prefetch_renditions_tag(parser, token):
+    """
+    Resolve the renditions of every image in a listing with one query before
+    the loop renders them with `{% cached_image %}`:
+
+        {% prefetch_renditions mentorpages fill-348x448 fill-50x50 image=thumbnail_image %}
+        {% prefetch_renditions coursepages max-600x400 image=main_image as coursepages %}
+
+    `image=` names the attribute (or method) giving each object's image; the
+    `as` form binds the resolved list, for callables such as the lazy home page
+    listings.
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            "'prefetch_renditions' tag should be of the form "
+            "{% prefetch_renditions objects filter-spec [filter-spec ...] [image=attr] [as var] %}"
+        )
+
+    objects_expr = parser.compile_filter(bits[1])
+    bits = bits[2:]
+
+    output_var_name = None
+    if len(bits) >= 2 and bits[-2] == 'as':
+        output_var_name = bits[-1]
+        bits = bits[:-2]
+
+    image_attr = None
+    filter_specs = []
+    for bit in bits:
+        if bit.startswith('image='):
+            image_attr = bit[len('image='):]
+        else:
+            filter_specs.append(bit)
+
+    return PrefetchRenditionsNode(objects_expr, filter_specs, image_attr=image_attr, output_var_name=output_var_name)
@@ -0,0 +1,188 @@
+import datetime
+import json
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase
+from taggit.models import Tag
+from wagtail.core.models import Page
+
+from course.models import CoursePage
+from home.facets import get_facets, refresh_facets
+from home.generations import append_journal, get_generation, read_journal
+from home.listing import ListingPaginator
+from home.management.commands.explain_listings import mysql_plan_problems
+from home.models import ListingFacet
+
+BODY = '[{"type": "段落", "value": "<p>课程内容</p>"}]'
+
+
+def create_course(slug, category='workshop', tags=(), **kwargs):
+    # Saved as a draft, then published like the admin does
+    page = CoursePage(title='课程 {}'.format(slug), slug=slug, date=datetime.date(2019, 5, 1), intro='课程简介',
+                      category=category, body=BODY, live=False, **kwargs)
+    Page.get_first_root_node().add_child(instance=page)
+    return publish(page, tags)
+
+
+def publish(page, tags=None):
+    if tags is not None:
+        page.tags.set(*tags)
+    page.save_revision().publish()
+    return CoursePage.objects.get(pk=page.pk)
+
+
+class JournalTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_read_entries_since(self):
+        start = get_generation('test-journal')
+        append_journal('test-journal', [1, 2], 60)
+        append_journal('test-journal', [3], 60)
+        until = get_generation('test-journal')
+        self.assertEqual(read_journal('test-journal', start, until), [1, 2, 3])
+        self.assertEqual(read_journal('test-journal', start + 1, until), [3])
+        self.assertEqual(read_journal('test-journal', until, until), [])
+
+    def test_missing_entry_loses_the_journal(self):
+        start = get_generation('test-journal')
+        append_journal('test-journal', [1], 60)
+        append_journal('test-journal', [2], 60)
+        append_journal('test-journal', [3], 60)
+        cache.delete('test-journal:{}'.format(start + 2))
+        until = get_generation('test-journal')
+        self.assertIsNone(read_journal('test-journal', start, until))
+        # Past the gap the journal reads again
+        self.assertEqual(read_journal('test-journal', start + 2, until), [3])
+
+
+class ListingPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = Page.get_first_root_node()
+        published = datetime.datetime(2019, 5, 1, 12)
+        for i in range(8):
+            # Two pages per timestamp: the id breaks the tie
+            page = CoursePage(title='课程{}'.format(i), slug='course-{}'.format(i), date=datetime.date(2019, 5, 1),
+                              intro='课程简介', body=BODY,
+                              first_published_at=published - datetime.timedelta(days=i // 2))
+            root.add_child(instance=page)
+        draft = CoursePage(title='草稿', slug='draft', date=datetime.date(2019, 5, 1), intro='课程简介', body=BODY,
+                           live=False, first_published_at=published)
+        root.add_child(instance=draft)
+
+        self.expected = list(CoursePage.objects.live().order_by('-first_published_at', '-pk').values_list('pk', flat=True))
+
+    def pks(self, listing_page):
+        return [page.pk for page in listing_page]
+
+    def test_count(self):
+        paginator = ListingPaginator(CoursePage.objects.all(), 3)
+        self.assertEqual(paginator.count, 8)
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_cursors(self):
+        paginator = ListingPaginator(CoursePage.objects.all(), 3)
+        first = paginator.page(1)
+        self.assertEqual(self.pks(first), self.expected[:3])
+        self.assertTrue(first.has_next())
+        self.assertFalse(first.has_previous())
+
+        second = paginator.page(2, after=first.next_cursor)
+        self.assertEqual(self.pks(second), self.expected[3:6])
+        third = paginator.page(3, after=second.next_cursor)
+        self.assertEqual(self.pks(third), self.expected[6:])
+        self.assertFalse(third.has_next())
+        self.assertEqual(third.next_cursor, '')
+
+        back = paginator.page(2, before=third.previous_cursor)
+        self.assertEqual(self.pks(back), self.expected[3:6])
+
+    def test_page_numbers(self):
+        paginator = ListingPaginator(CoursePage.objects.all(), 3)
+        # A cold jump (OFFSET) and a page after a remembered boundary agree
+        self.assertEqual(self.pks(paginator.page(3)), self.expected[6:])
+        paginator.page(1)
+        self.assertEqual(self.pks(paginator.page(2)), self.expected[3:6])
+        # Out of range numbers are clamped, bad cursors ignored
+        self.assertEqual(self.pks(paginator.page(99)), self.expected[6:])
+        self.assertEqual(self.pks(paginator.page('x', after='bad')), self.expected[:3])
+
+
+class PlanCheckTests(SimpleTestCase):
+    def test_mysql_json_plan(self):
+        plan = json.dumps({'query_block': {'ordering_operation': {
+            'using_filesort': True,
+            'nested_loop': [
+                {'table': {'table_name': 'wagtailcore_page', 'access_type': 'ALL'}},
+                {'table': {'table_name': 'course_coursepage', 'access_type': 'eq_ref'}},
+            ]}}})
+        self.assertEqual(mysql_plan_problems(plan), ['Using filesort', 'full scan of wagtailcore_page'])
+
+    def test_mysql_indexed_plan(self):
+        plan = json.dumps({'query_block': {'ordering_operation': {'using_filesort': False, 'table': {
+            'table_name': 'wagtailcore_page', 'access_type': 'range', 'key': 'wagtailcore_page_live_published'}}}})
+        self.assertEqual(mysql_plan_problems(plan), [])
+
+
+class FacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.content_type = ContentType.objects.get_for_model(CoursePage)
+
+    def counts(self):
+        return {(facet.kind, facet.value): facet.count
+                for facet in ListingFacet.objects.filter(content_type=self.content_type) if facet.count}
+
+    def assertMatchesRecount(self):
+        counts = self.counts()
+        refresh_facets(CoursePage)
+        self.assertEqual(counts, self.counts())
+
+    def test_publish_applies_deltas(self):
+        first = create_course('first', tags=['初级', '哈他'])
+        create_course('second', category='faculty', tags=['初级'])
+        self.assertEqual(self.counts(), {('tag', '初级'): 2, ('tag', '哈他'): 1,
+                                         ('category', 'workshop'): 1, ('category', 'faculty'): 1})
+
+        publish(first, ['进阶'])
+        self.assertEqual(self.counts(), {('tag', '初级'): 1, ('tag', '进阶'): 1,
+                                         ('category', 'workshop'): 1, ('category', 'faculty'): 1})
+        self.assertMatchesRecount()
+
+    def test_unpublish_and_delete(self):
+        first = create_course('first', tags=['初级'])
+        second = create_course('second', tags=['初级'])
+        first.unpublish()
+        self.assertEqual(self.counts(), {('tag', '初级'): 1, ('category', 'workshop'): 1})
+        second.delete()
+        self.assertEqual(self.counts(), {})
+        self.assertMatchesRecount()
+
+        # Publishing again counts the page once
+        publish(CoursePage.objects.get(pk=first.pk))
+        publish(CoursePage.objects.get(pk=first.pk))
+        self.assertEqual(self.counts(), {('tag', '初级'): 1, ('category', 'workshop'): 1})
+
+    def test_tag_rename_and_delete(self):
+        create_course('first', tags=['初级'])
+        tag = Tag.objects.get(name='初级')
+        tag.name = '入门'
+        tag.save()
+        self.assertEqual(self.counts(), {('tag', '入门'): 1, ('category', 'workshop'): 1})
+        tag.delete()
+        self.assertEqual(self.counts(), {('category', 'workshop'): 1})
+        self.assertMatchesRecount()
+
+    def test_template_tag(self):
+        create_course('first', tags=['初级'])
+        create_course('second', category='faculty', tags=['初级', '哈他'])
+        self.assertEqual(get_facets('category', 'course.CoursePage'), [
+            {'value': 'faculty', 'label': '师资培训', 'count': 1},
+            {'value': 'workshop', 'label': '名师工作坊', 'count': 1},
+        ])
+        html = Template('{% load yonion_tags %}{% listing_facets "course.CoursePage" "tag" as tags %}'
+                        '{% for tag in tags %}{{ tag.label }}:{{ tag.count }} {% endfor %}').render(Context())
+        self.assertEqual(html, '初级:2 哈他:1 ')
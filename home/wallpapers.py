@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 09:30
+
+from django.conf import settings
+from django.core.cache import cache
+
+from home.generations import bump_generation, get_generation
+from home.renditions import prefetch_renditions
+
+
+class WallpaperRegistry(object):
+    """
+    Resolve a wallpaper tag (e.g. "课程壁纸") to its newest images.
+
+    Lookups are served from a process-local dict, backed by the shared cache.
+    Both tiers are keyed by the 'wallpaper' generation (see `home.generations`),
+    which is bumped by the image signals in `home.signals`, so every worker
+    drops its local copy on the next lookup after a wallpaper changes.
+    """
+
+    def __init__(self):
+        self._generation = None
+        self._local = {}
+
+    def _current_generation(self):
+        generation = get_generation('wallpaper')
+        if generation != self._generation:
+            self._generation = generation
+            self._local = {}
+        return generation
+
+    def _load(self, tag, limit):
+        from wagtail.images.models import Image
+
+        images = list(Image.objects.filter(tags__name=tag).order_by('-created_at')[:limit])
+        return prefetch_renditions(images, 'original')
+
+    def get_many(self, tag, limit):
+        generation = self._current_generation()
+        images = self._local.get((tag, limit))
+        if images is None:
+            cache_key = 'wallpaper:{}:{}:{}'.format(generation, tag, limit)
+            images = cache.get(cache_key)
+            if images is None:
+                images = self._load(tag, limit)
+                cache.set(cache_key, images, settings.YONION_WALLPAPER_CACHE_TIMEOUT)
+            self._local[(tag, limit)] = images
+        return images
+
+    def get(self, tag):
+        images = self.get_many(tag, 1)
+        if images:
+            return images[0]
+
+        fallback = settings.YONION_WALLPAPER_FALLBACK_TAG
+        if fallback and fallback != tag:
+            return self.get(fallback)
+        return None
+
+    def invalidate(self):
+        self._local = {}
+        bump_generation('wallpaper')
+
+
+wallpaper_registry = WallpaperRegistry()
+
+
+def get_wallpaper(tag):
+    return wallpaper_registry.get(tag)
+
+
+def get_wallpapers(tag, limit):
+    return wallpaper_registry.get_many(tag, limit)
@@ -0,0 +1,25 @@
+# Generated by Django 2.2.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentor', '0004_auto_20190530_1317'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentorpage',
+            index=models.Index(fields=['category'], name='mentor_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorpagetag',
+            index=models.Index(fields=['tag', 'content_object'], name='mentor_tag_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mentorpagetag',
+            index=models.Index(fields=['content_object', 'tag'], name='mentor_object_tag_idx'),
+        ),
+    ]
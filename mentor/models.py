@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from django.db import models
-from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.models import TaggedItemBase
@@ -13,6 +12,10 @@ from wagtail.admin.edit_handlers import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.images.edit_handlers import ImageChooserPanel
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.images.models import Image
+from home.gallery import first_gallery_item, gallery_items
+from home.listing import paginate_listing
+from home.recommendations import get_recommendations
+from home.wallpapers import get_wallpaper
 from wagtail.search import index
 
 from course.models import CoursePage
@@ -33,18 +36,9 @@ class MentorIndexPage(Page):
     def get_context(self, request):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
-        mentorpages = self.get_children().live().order_by('-first_published_at')
-        wallpaper = Image.objects.filter(tags__name="课程壁纸").order_by('-created_at')[0]
-        paginator = Paginator(mentorpages, 3) # Show 3 resources per page
-        page = request.GET.get('page')
-        try:
-            mentorpages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            mentorpages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            mentorpages = paginator.page(paginator.num_pages)
+        mentorpages = self.get_children().live().specific().order_by('-first_published_at')
+        wallpaper = get_wallpaper("课程壁纸")
+        mentorpages = paginate_listing(request, mentorpages, 3) # Show 3 resources per page
 
         # make the variable 'resources' available on the template
         context['mentorpages'] = mentorpages
@@ -59,6 +53,13 @@ class MentorPageTag(TaggedItemBase):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        # ?tag= listings resolve the tag first, keyset scans probe per page
+        indexes = [
+            models.Index(fields=['tag', 'content_object'], name='mentor_tag_object_idx'),
+            models.Index(fields=['content_object', 'tag'], name='mentor_object_tag_idx'),
+        ]
+
 
 class MentorTagIndexPage(Page):
     class Meta:
@@ -78,19 +79,10 @@ class MentorTagIndexPage(Page):
         if cate and cate != '':
             mentorpages = mentorpages.filter(category=cate).order_by('-first_published_at')
 
-        wallpaper = Image.objects.filter(tags__name="导师壁纸").order_by('-created_at')[0]
-        # Workshop Course
-        umaylike = CoursePage.objects.filter(category='workshop')[:6]
-        paginator = Paginator(mentorpages, 6) # Show 6 resources per page
-        page = request.GET.get('page')
-        try:
-            mentorpages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            mentorpages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            mentorpages = paginator.page(paginator.num_pages)
+        wallpaper = get_wallpaper("导师壁纸")
+        mentorpages = paginate_listing(request, mentorpages, 6) # Show 6 resources per page
+        # Workshop courses related to the pages on screen
+        umaylike = get_recommendations(mentorpages)
 
         # Update template context
         context = super().get_context(request)
@@ -122,20 +114,23 @@ class MentorPage(Page):
     class Meta:
         verbose_name = '老师详情页'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['category'], name='mentor_category_idx'),
+        ]
 
     def thumbnail_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
             return None
 
     def banner_image(self):
-        gallery_items = self.gallery_images.all()
-        if len(gallery_items) < 2:
+        items = gallery_items(self)
+        if len(items) < 2:
             return None
         else:
-            return gallery_items[1].image
+            return items[1].image
 
     search_fields = Page.search_fields + [
         index.SearchField('intro'),
@@ -157,7 +152,7 @@ class MentorPage(Page):
     ]
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="导师壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("导师壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
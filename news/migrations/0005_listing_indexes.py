@@ -0,0 +1,25 @@
+# Generated by Django 2.2.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_auto_20190530_1317'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newspage',
+            index=models.Index(fields=['category'], name='news_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newspagetag',
+            index=models.Index(fields=['tag', 'content_object'], name='news_tag_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='newspagetag',
+            index=models.Index(fields=['content_object', 'tag'], name='news_object_tag_idx'),
+        ),
+    ]
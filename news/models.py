@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from django.db import models
-from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.models import TaggedItemBase
@@ -13,6 +12,10 @@ from wagtail.admin.edit_handlers import FieldPanel, InlinePanel, MultiFieldPanel
 from wagtail.images.edit_handlers import ImageChooserPanel
 from wagtail.images.blocks import ImageChooserBlock
 from wagtail.images.models import Image
+from home.gallery import first_gallery_item
+from home.listing import paginate_listing
+from home.recommendations import get_recommendations
+from home.wallpapers import get_wallpaper
 from wagtail.search import index
 from course.models import CoursePage
 
@@ -32,18 +35,9 @@ class NewsIndexPage(Page):
     def get_context(self, request):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
-        newspages = self.get_children().live().order_by('-first_published_at')
-        wallpaper = Image.objects.filter(tags__name="资讯壁纸").order_by('-created_at')[0]
-        paginator = Paginator(newspages, 3) # Show 3 resources per page
-        page = request.GET.get('page')
-        try:
-            newspages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            newspages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            newspages = paginator.page(paginator.num_pages)
+        newspages = self.get_children().live().specific().order_by('-first_published_at')
+        wallpaper = get_wallpaper("资讯壁纸")
+        newspages = paginate_listing(request, newspages, 3) # Show 3 resources per page
 
         # make the variable 'resources' available on the template
         context['newspages'] = newspages
@@ -58,6 +52,13 @@ class NewsPageTag(TaggedItemBase):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        # ?tag= listings resolve the tag first, keyset scans probe per page
+        indexes = [
+            models.Index(fields=['tag', 'content_object'], name='news_tag_object_idx'),
+            models.Index(fields=['content_object', 'tag'], name='news_object_tag_idx'),
+        ]
+
 
 class NewsTagIndexPage(Page):
     class Meta:
@@ -77,19 +78,10 @@ class NewsTagIndexPage(Page):
         if cate and cate != '':
             newspages = newspages.filter(category=cate).order_by('-first_published_at')
 
-        wallpaper = Image.objects.filter(tags__name="资讯壁纸").order_by('-created_at')[0]
-        # Workshop
-        umaylike = CoursePage.objects.filter(category='workshop')[:6]
-        paginator = Paginator(newspages, 6) # Show 6 resources per page
-        page = request.GET.get('page')
-        try:
-            newspages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            newspages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            newspages = paginator.page(paginator.num_pages)
+        wallpaper = get_wallpaper("资讯壁纸")
+        newspages = paginate_listing(request, newspages, 6) # Show 6 resources per page
+        # Workshop courses related to the pages on screen
+        umaylike = get_recommendations(newspages)
 
         # Update template context
         context = super().get_context(request)
@@ -119,9 +111,12 @@ class NewsPage(Page):
     class Meta:
         verbose_name = '资讯详情页'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['category'], name='news_category_idx'),
+        ]
 
     def thumbnail_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
@@ -146,7 +141,7 @@ class NewsPage(Page):
     ]
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="资讯壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("资讯壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper
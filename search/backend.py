@@ -0,0 +1,621 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 16:20
+
+import copy
+import math
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models.query import QuerySet
+from wagtail.search import index
+from wagtail.search.backends.base import BaseSearchBackend, BaseSearchQueryCompiler, BaseSearchResults
+from wagtail.search.query import And, Boost, MatchAll, Not, Or, PlainText
+from wagtail.search.utils import OR
+
+from search.tokenizer import is_cjk, pinyin_tokens, plain_text, tokenize
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Pinyin forms of titles and names rank below the Chinese text itself
+PINYIN_WEIGHT = 0.5
+
+# Plain text kept per document for result snippets: every searchable field
+# but the title, tags stripped, up to this many characters
+SNIPPET_SOURCE_LENGTH = 4000
+
+# Search hits are checked against the queryset filters (live, descendant_of,
+# ...) this many primary keys at a time
+FILTER_CHUNK_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL UNIQUE,
+    content_type TEXT NOT NULL,
+    object_id TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_content_type ON documents (content_type, id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    weight REAL NOT NULL,
+    PRIMARY KEY (term, doc, field)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS facets (
+    doc INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (doc, name, value)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS texts (
+    doc INTEGER PRIMARY KEY,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS checkpoints (
+    name TEXT PRIMARY KEY,
+    last TEXT,
+    done INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+"""
+
+# One connection per process and index file, shared by every backend instance
+# (wagtail creates a new backend object for each search) and used by one
+# thread or greenlet at a time; {path: (pid, connection)}
+_connections = {}
+_connections_lock = threading.RLock()
+
+
+def _flatten(value):
+    if value is None:
+        return
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, (list, tuple, QuerySet)):
+        for item in value:
+            yield from _flatten(item)
+    else:
+        yield str(value)
+
+
+def _field_texts(obj, field):
+    """
+    Yield (field name, boost, text) for one entry of `search_fields`.
+    """
+    if isinstance(field, index.RelatedFields):
+        value = field.get_value(obj)
+        if value is None:
+            return
+        related = value.all() if isinstance(value, models.Manager) else [value]
+        for item in related:
+            for subfield in field.fields:
+                for name, boost, text in _field_texts(item, subfield):
+                    yield field.field_name + '__' + name, boost, text
+    elif isinstance(field, index.SearchField):
+        boost = field.boost or 1
+        for text in _flatten(field.get_value(obj)):
+            yield field.field_name, boost, text
+
+
+def _is_char_field(model, field_name):
+    # Titles and names (CharFields) get pinyin forms; rich text and bodies don't
+    try:
+        return isinstance(model._meta.get_field(field_name), models.CharField)
+    except FieldDoesNotExist:
+        return False
+
+
+def _document_facets(obj):
+    """
+    Facet values stored with a document: its type ('course.coursepage'), its
+    `category` field and its tag names, where the model has them.
+    """
+    facets = {('type', obj._meta.label_lower)}
+    try:
+        obj._meta.get_field('category')
+    except FieldDoesNotExist:
+        pass
+    else:
+        if obj.category:
+            facets.add(('category', obj.category))
+    tags = getattr(obj, 'tags', None)
+    if hasattr(tags, 'names'):
+        facets.update(('tag', name) for name in tags.names())
+    return facets
+
+
+def _upper_bound(prefix):
+    # Smallest string greater than every string starting with `prefix`
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class LocalSearchIndex(object):
+    """
+    Inverted index in a sqlite3 file: one posting per (term, document,
+    field) with the boosted term frequency as weight, plus the document
+    frequency of every term and the collection size for BM25.
+
+    A term lookup is a range read on the postings primary key, so query time
+    depends on how many documents contain the terms, not on the table size.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.name = os.path.basename(backend.path)
+
+    @contextmanager
+    def transaction(self):
+        with self.backend.connection() as connection:
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield connection
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+            else:
+                connection.execute('COMMIT')
+
+    # Indexing
+
+    def add_model(self, model):
+        # The schema does not depend on the model
+        pass
+
+    def refresh(self):
+        pass
+
+    def reset(self):
+        with self.transaction() as connection:
+            for table in ('postings', 'facets', 'texts', 'terms', 'documents', 'stats', 'checkpoints'):
+                connection.execute('DELETE FROM {}'.format(table))
+
+    def optimize(self):
+        with self.backend.connection() as connection:
+            connection.execute('ANALYZE')
+
+    def _doc_key(self, obj):
+        return '{}:{}'.format(type(obj).indexed_get_toplevel_content_type(), obj.pk)
+
+    def _delete(self, connection, obj):
+        row = connection.execute('SELECT id, length FROM documents WHERE doc_key = ?', (self._doc_key(obj),)).fetchone()
+        if row is None:
+            return
+        doc, length = row
+        terms = [(term,) for term, in connection.execute('SELECT DISTINCT term FROM postings WHERE doc = ?', (doc,))]
+        connection.executemany('UPDATE terms SET df = df - 1 WHERE term = ?', terms)
+        connection.executemany('DELETE FROM terms WHERE term = ? AND df <= 0', terms)
+        connection.execute('DELETE FROM postings WHERE doc = ?', (doc,))
+        connection.execute('DELETE FROM facets WHERE doc = ?', (doc,))
+        connection.execute('DELETE FROM texts WHERE doc = ?', (doc,))
+        connection.execute('DELETE FROM documents WHERE id = ?', (doc,))
+        self._update_stats(connection, -1, -length)
+
+    def _insert(self, connection, obj):
+        weights = defaultdict(float)
+        length = 0
+        texts = []
+        for field in type(obj).get_search_fields():
+            for name, boost, text in _field_texts(obj, field):
+                if name != 'title':
+                    texts.append(plain_text(text))
+                tokens = tokenize(text)
+                length += len(tokens)
+                for token in tokens:
+                    weights[(token, name)] += boost
+                if _is_char_field(type(obj), name):
+                    for token in pinyin_tokens(text):
+                        weights[(token, name)] += boost * PINYIN_WEIGHT
+
+        cursor = connection.execute(
+            'INSERT INTO documents (doc_key, content_type, object_id, length) VALUES (?, ?, ?, ?)',
+            (self._doc_key(obj), type(obj).indexed_get_content_type(), str(obj.pk), length))
+        doc = cursor.lastrowid
+
+        connection.executemany(
+            'INSERT INTO postings (term, doc, field, weight) VALUES (?, ?, ?, ?)',
+            [(term, doc, name, weight) for (term, name), weight in weights.items()])
+        connection.executemany(
+            'INSERT INTO terms (term, df) VALUES (?, 1) ON CONFLICT (term) DO UPDATE SET df = df + 1',
+            [(term,) for term in {term for term, name in weights}])
+        connection.executemany(
+            'INSERT INTO facets (doc, name, value) VALUES (?, ?, ?)',
+            [(doc, name, value) for name, value in _document_facets(obj)])
+        connection.execute(
+            'INSERT INTO texts (doc, text) VALUES (?, ?)',
+            (doc, ' '.join(text for text in texts if text)[:SNIPPET_SOURCE_LENGTH]))
+        self._update_stats(connection, 1, length)
+
+    def _update_stats(self, connection, documents, length):
+        connection.executemany(
+            'INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            [('documents', documents), ('length', length)])
+
+    def add_item(self, obj):
+        self.add_items(type(obj), [obj])
+
+    def add_items(self, model, objs):
+        with self.transaction() as connection:
+            for obj in objs:
+                self._delete(connection, obj)
+                self._insert(connection, obj)
+
+    def delete_item(self, obj):
+        self.delete_items([obj])
+
+    def delete_items(self, objs):
+        with self.transaction() as connection:
+            for obj in objs:
+                self._delete(connection, obj)
+
+    def object_ids(self, model, chunk_size):
+        """
+        Yield lists of the object ids indexed as exactly `model` (not its
+        subclasses), at most `chunk_size` at a time.
+        """
+        content_type = model.indexed_get_content_type()
+        last = 0
+        while True:
+            # Not held between chunks: the caller indexes in between
+            with self.backend.connection() as connection:
+                rows = connection.execute(
+                    'SELECT id, object_id FROM documents WHERE content_type = ? AND id > ? ORDER BY id LIMIT ?',
+                    (content_type, last, chunk_size)).fetchall()
+            if not rows:
+                return
+            last = rows[-1][0]
+            yield [object_id for doc, object_id in rows]
+
+    # Progress of `update_index --chunked`, kept with the index it describes
+
+    def get_checkpoint(self, name):
+        """
+        Return (last object id, done) recorded for `name`, (None, False) if
+        nothing was recorded.
+        """
+        with self.backend.connection() as connection:
+            row = connection.execute('SELECT last, done FROM checkpoints WHERE name = ?', (name,)).fetchone()
+        return (row[0], bool(row[1])) if row else (None, False)
+
+    def set_checkpoint(self, name, last, done=False):
+        with self.backend.connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO checkpoints (name, last, done) VALUES (?, ?, ?)',
+                (name, None if last is None else str(last), int(done)))
+
+    def clear_checkpoints(self):
+        with self.backend.connection() as connection:
+            connection.execute('DELETE FROM checkpoints')
+
+    # Searching
+
+    def search(self, query_compiler):
+        """
+        Return {object_id: BM25 score} for the documents of the compiler's
+        model (and its subclasses) matching its query.
+        """
+        with self.backend.connection() as connection:
+            stats = dict(connection.execute('SELECT name, value FROM stats'))
+            documents = stats.get('documents', 0)
+            if not documents:
+                return {}
+
+            context = {
+                'connection': connection,
+                'documents': documents,
+                'average_length': float(stats.get('length', 0)) / documents or 1.0,
+                'content_type': query_compiler.queryset.model.indexed_get_content_type(),
+                'fields': query_compiler.fields,
+                'partial_match': query_compiler.partial_match,
+            }
+            return self._match(context, query_compiler.query, 1.0)
+
+    def facets(self, query_compiler, object_ids):
+        """
+        Return {object_id: {(name, value), ...}} for the given hits of the
+        compiler's model. Documents are looked up by their unique doc_key, so
+        the cost depends on the number of hits only.
+        """
+        content_type = query_compiler.queryset.model.indexed_get_toplevel_content_type()
+        keys = ['{}:{}'.format(content_type, object_id) for object_id in object_ids]
+
+        facets = defaultdict(set)
+        with self.backend.connection() as connection:
+            for i in range(0, len(keys), FILTER_CHUNK_SIZE):
+                chunk = keys[i:i + FILTER_CHUNK_SIZE]
+                for object_id, name, value in connection.execute(
+                        'SELECT d.object_id, f.name, f.value FROM documents d JOIN facets f ON f.doc = d.id '
+                        'WHERE d.doc_key IN ({})'.format(', '.join('?' * len(chunk))), chunk):
+                    facets[object_id].add((name, value))
+        return facets
+
+    def texts(self, model, object_ids):
+        """
+        Return {object_id: plain text} stored for the given `model` objects.
+        """
+        keys = ['{}:{}'.format(model.indexed_get_toplevel_content_type(), object_id) for object_id in object_ids]
+        if not keys:
+            return {}
+        with self.backend.connection() as connection:
+            return dict(connection.execute(
+                'SELECT d.object_id, t.text FROM documents d JOIN texts t ON t.doc = d.id '
+                'WHERE d.doc_key IN ({})'.format(', '.join('?' * len(keys))), keys))
+
+    def _match(self, context, query, boost):
+        if isinstance(query, PlainText):
+            boost *= query.boost
+            matches = [self._match_term(context, token, boost) for token in tokenize(query.query_string)]
+            if query.operator == 'or':
+                return self._union(matches)
+            return self._intersection(matches)
+        if isinstance(query, Boost):
+            return self._match(context, query.subquery, boost * query.boost)
+        if isinstance(query, And):
+            return self._intersection([self._match(context, subquery, boost) for subquery in query.subqueries])
+        if isinstance(query, Or):
+            return self._union([self._match(context, subquery, boost) for subquery in query.subqueries])
+        if isinstance(query, Not):
+            excluded = self._match(context, query.subquery, boost)
+            return {object_id: 0.0 for object_id in self._all(context) if object_id not in excluded}
+        if isinstance(query, MatchAll):
+            return {object_id: 0.0 for object_id in self._all(context)}
+        raise NotImplementedError('`{}` is not supported by the local search backend.'.format(query.__class__.__name__))
+
+    def _content_type_clause(self, context):
+        content_type = context['content_type']
+        # The model itself and every subclass ("wagtailcore_page_course_coursepage")
+        return ('(d.content_type = ? OR (d.content_type > ? AND d.content_type < ?))',
+                [content_type, content_type + '_', content_type + '`'])
+
+    def _all(self, context):
+        clause, params = self._content_type_clause(context)
+        return [object_id for object_id, in context['connection'].execute(
+            'SELECT d.object_id FROM documents d WHERE ' + clause, params)]
+
+    def _match_term(self, context, token, boost):
+        # Single Chinese characters and (with partial_match) latin words also
+        # match longer terms starting with them
+        if len(token) == 1 and is_cjk(token) or context['partial_match'] and not is_cjk(token):
+            term_clause, params = 'p.term >= ? AND p.term < ?', [token, _upper_bound(token)]
+        else:
+            term_clause, params = 'p.term = ?', [token]
+
+        content_type_clause, content_type_params = self._content_type_clause(context)
+        sql = ('SELECT p.term, d.object_id, d.length, SUM(p.weight) '
+               'FROM postings p JOIN documents d ON d.id = p.doc '
+               'WHERE ' + term_clause + ' AND ' + content_type_clause)
+        params += content_type_params
+        if context['fields']:
+            sql += ' AND p.field IN ({})'.format(', '.join('?' * len(context['fields'])))
+            params += list(context['fields'])
+        sql += ' GROUP BY p.term, p.doc'
+
+        connection = context['connection']
+        rows = connection.execute(sql, params).fetchall()
+        terms = list({row[0] for row in rows})
+        frequencies = dict(connection.execute(
+            'SELECT term, df FROM terms WHERE term IN ({})'.format(', '.join('?' * len(terms))), terms)) if terms else {}
+
+        scores = defaultdict(float)
+        for term, object_id, length, weight in rows:
+            df = frequencies.get(term, 1)
+            idf = math.log(1 + (context['documents'] - df + 0.5) / (df + 0.5))
+            norm = K1 * (1 - B + B * length / context['average_length'])
+            scores[object_id] += boost * idf * weight * (K1 + 1) / (weight + norm)
+        return scores
+
+    def _intersection(self, matches):
+        if not matches:
+            return {}
+        result = dict(matches[0])
+        for match in matches[1:]:
+            result = {object_id: score + match[object_id] for object_id, score in result.items() if object_id in match}
+        return result
+
+    def _union(self, matches):
+        result = defaultdict(float)
+        for match in matches:
+            for object_id, score in match.items():
+                result[object_id] += score
+        return result
+
+
+class LocalSearchQueryCompiler(BaseSearchQueryCompiler):
+    # Same default as the database backend the site used before
+    DEFAULT_OPERATOR = 'and'
+
+    def _process_lookup(self, field, lookup, value):
+        return models.Q(**{field.get_attname(self.queryset.model) + '__' + lookup: value})
+
+    def _connect_filters(self, filters, connector, negated):
+        if connector == 'AND':
+            q = models.Q(*filters)
+        elif connector == 'OR':
+            q = OR([models.Q(fil) for fil in filters])
+        else:
+            return
+
+        if negated:
+            q = ~q
+
+        return q
+
+
+class LocalSearchResults(BaseSearchResults):
+    supports_facet = True
+
+    def filter_facets(self, **filters):
+        """
+        Narrow the results to documents carrying every given facet value,
+        e.g. `.filter_facets(category='workshop', tag='瑜伽')`. Filters set to
+        None are ignored.
+        """
+        clone = self._clone()
+        clone.query_compiler = copy.copy(self.query_compiler)
+        clone.query_compiler._matches = None
+        clone.query_compiler.facet_filters = dict(
+            getattr(self.query_compiler, 'facet_filters', {}),
+            **{name: value for name, value in filters.items() if value is not None})
+        return clone
+
+    def _matches(self):
+        """
+        Primary keys of the hits that pass the facet and queryset filters, in
+        result order, their scores and their facet values. Computed once per
+        query and shared by the count, the facets and every slice.
+        """
+        query_compiler = self.query_compiler
+        if getattr(query_compiler, '_matches', None) is None:
+            queryset = query_compiler.queryset
+            to_python = queryset.model._meta.pk.to_python
+            index = self.backend.index
+            scores = index.search(query_compiler)
+            facets = index.facets(query_compiler, scores)
+
+            wanted = set(getattr(query_compiler, 'facet_filters', {}).items())
+            if wanted:
+                scores = {object_id: score for object_id, score in scores.items() if wanted <= facets[object_id]}
+            facets = {to_python(object_id): facets[object_id] for object_id in scores}
+            scores = {to_python(object_id): score for object_id, score in scores.items()}
+
+            hits = list(scores)
+            if query_compiler.order_by_relevance:
+                passed = []
+                for i in range(0, len(hits), FILTER_CHUNK_SIZE):
+                    passed += queryset.filter(pk__in=hits[i:i + FILTER_CHUNK_SIZE]).order_by().values_list('pk', flat=True)
+                ordered = sorted(passed, key=lambda pk: (-scores[pk], pk))
+            else:
+                ordered = list(queryset.filter(pk__in=hits).values_list('pk', flat=True)) if hits else []
+
+            query_compiler._matches = (ordered, scores, facets)
+        return query_compiler._matches
+
+    def pks(self):
+        """
+        Primary keys of the results in order, without loading the objects.
+        """
+        ordered, scores, facets = self._matches()
+        return ordered[self.start:self.stop]
+
+    def facets(self):
+        """
+        {pk: {(name, value), ...}} for every result, read in the same pass as
+        the results themselves.
+        """
+        ordered, scores, facets = self._matches()
+        return {pk: facets[pk] for pk in ordered}
+
+    def facet(self, field_name):
+        counts = defaultdict(int)
+        for values in self.facets().values():
+            for name, value in values:
+                if name == field_name:
+                    counts[value] += 1
+        return OrderedDict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+
+    def _do_search(self):
+        ordered, scores, facets = self._matches()
+        pks = ordered[self.start:self.stop]
+
+        queryset = self.query_compiler.queryset
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        objects = queryset.in_bulk(pks)
+
+        results = []
+        for pk in pks:
+            obj = objects.get(pk)
+            if obj is not None:
+                if self._score_field:
+                    setattr(obj, self._score_field, scores[pk])
+                results.append(obj)
+        return results
+
+    def _do_count(self):
+        ordered, scores, facets = self._matches()
+        return len(ordered[self.start:self.stop])
+
+
+class LocalSearchRebuilder(object):
+    def __init__(self, index):
+        self.index = index
+
+    def start(self):
+        self.index.reset()
+        return self.index
+
+    def finish(self):
+        self.index.optimize()
+
+
+class LocalSearchBackend(BaseSearchBackend):
+    """
+    Wagtail search backend over a local inverted index (see
+    `LocalSearchIndex`), with Chinese bigram tokenization and BM25 ranking.
+    Kept up to date through the indexing queue (`search.queue`);
+    `update_index` rebuilds it from scratch, `update_index --chunked` in
+    place.
+    """
+    query_compiler_class = LocalSearchQueryCompiler
+    autocomplete_query_compiler_class = LocalSearchQueryCompiler
+    results_class = LocalSearchResults
+    rebuilder_class = LocalSearchRebuilder
+
+    def __init__(self, params):
+        super().__init__(params)
+        self.path = params.get('PATH') or os.path.join(settings.BASE_DIR, 'search_index.sqlite3')
+        self.index = LocalSearchIndex(self)
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode = WAL')
+        connection.executescript(SCHEMA)
+        return connection
+
+    @contextmanager
+    def connection(self):
+        """
+        The process's connection to the index, held for the `with` block.
+        Opened (and the schema created) once per process; a forked worker
+        opens its own.
+        """
+        with _connections_lock:
+            pid, connection = _connections.get(self.path, (None, None))
+            if pid != os.getpid():
+                connection = self._connect()
+                _connections[self.path] = (os.getpid(), connection)
+            yield connection
+
+    def get_index_for_model(self, model):
+        return self.index
+
+    def get_rebuilder(self):
+        return self.rebuilder_class(self.index)
+
+    def reset_index(self):
+        self.index.reset()
+
+
+SearchBackend = LocalSearchBackend
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 17:10
+
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from wagtail.core.models import Page
+from wagtail.search.utils import normalise_query_string
+
+from home.generations import bump_generation, get_generation
+
+# Page types offered as search filters, as stored in the index ('app.model')
+SEARCH_PAGE_TYPES = (
+    'course.coursepage',
+    'mentor.mentorpage',
+    'trainee.traineepage',
+    'news.newspage',
+    'certificate.certhelppage',
+)
+
+
+class LRUCache(object):
+    """
+    Small thread-safe in-process LRU, the first tier in front of the shared
+    cache.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_results = LRUCache(settings.YONION_SEARCH_CACHE_SIZE)
+
+
+def invalidate_search_results():
+    # Every cached result list is keyed by this generation
+    bump_generation('search')
+
+
+def _counts(ids, facets, name):
+    counts = Counter(value for pk in ids for facet, value in facets[pk] if facet == name)
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def cached_search(query_string, page_type=None, category=None, tag=None):
+    """
+    Return {'ids': [...], 'facets': {'type': [...], 'category': [...],
+    'tag': [...]}} for the live pages matching `query_string`: ids best
+    first, facets as (value, count) pairs, all counted from the single
+    search pass. Type counts ignore the `page_type` filter so the other
+    types stay reachable.
+
+    Cached per normalised query and filters, in process and in the shared
+    cache, until the indexing queue applies the next change. One entry
+    serves every page number of the results.
+    """
+    query_string = normalise_query_string(query_string)
+    signature = hashlib.md5('\n'.join([query_string, page_type or '', category or '', tag or '']).encode('utf-8')).hexdigest()
+    key = 'search:{}:{}'.format(get_generation('search'), signature)
+
+    results = local_results.get(key)
+    if results is None:
+        results = cache.get(key)
+        if results is None:
+            found = Page.objects.live().search(query_string).filter_facets(category=category, tag=tag)
+            ids, facets = found.pks(), found.facets()
+
+            types = [(value, count) for value, count in _counts(ids, facets, 'type') if value in SEARCH_PAGE_TYPES]
+            if page_type:
+                ids = [pk for pk in ids if ('type', page_type) in facets[pk]]
+            results = {
+                'ids': ids,
+                'facets': {
+                    'type': types,
+                    'category': _counts(ids, facets, 'category'),
+                    'tag': _counts(ids, facets, 'tag'),
+                },
+            }
+            cache.set(key, results, settings.YONION_SEARCH_CACHE_TIMEOUT)
+        local_results.set(key, results)
+    return results
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 16:50
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from wagtail.search.models import Query, QueryDailyHits
+from wagtail.search.utils import normalise_query_string
+
+logger = logging.getLogger(__name__)
+
+
+class HitBuffer(object):
+    """
+    Search hits counted in memory per (date, query string) and written to
+    wagtailsearch_query_daily_hits in one transaction when the buffer grows
+    past YONION_SEARCH_HIT_FLUSH_SIZE entries, when it is older than
+    YONION_SEARCH_HIT_FLUSH_INTERVAL seconds, or when the worker exits.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = Counter()
+        self._since = time.time()
+
+    def record(self, query_string):
+        query_string = normalise_query_string(query_string)
+        if not query_string:
+            return
+
+        with self._lock:
+            self._hits[(timezone.now().date(), query_string)] += 1
+            due = (len(self._hits) >= settings.YONION_SEARCH_HIT_FLUSH_SIZE
+                   or time.time() - self._since >= settings.YONION_SEARCH_HIT_FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            hits, self._hits = self._hits, Counter()
+            self._since = time.time()
+        if not hits:
+            return
+
+        try:
+            with transaction.atomic():
+                for (date, query_string), count in hits.items():
+                    query = Query.get(query_string)
+                    daily_hits, created = QueryDailyHits.objects.get_or_create(
+                        query=query, date=date, defaults={'hits': count})
+                    if not created:
+                        QueryDailyHits.objects.filter(pk=daily_hits.pk).update(hits=F('hits') + count)
+        except Exception:
+            # Keep the counts for the next flush rather than losing them
+            logger.exception('Could not flush %d search hit counters', len(hits))
+            with self._lock:
+                self._hits.update(hits)
+
+
+hit_buffer = HitBuffer()
+atexit.register(hit_buffer.flush)
+
+
+def record_hit(query_string):
+    hit_buffer.record(query_string)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 18:10
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from search.queue import drain_queue
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Apply the queued search index changes in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.YONION_SEARCH_INDEX_BATCH_SIZE,
+            help='Queued changes applied per batch')
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running and poll the queue instead of exiting once it is empty')
+        parser.add_argument(
+            '--interval', type=float, default=settings.YONION_SEARCH_INDEX_INTERVAL,
+            help='Seconds between polls of an empty queue with --watch')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                entries, indexed, removed, failed = drain_queue(options['batch_size'])
+            except Exception:
+                if not options['watch']:
+                    raise
+                # The database or the index is unavailable: try again later
+                logger.exception('Could not process the search index queue')
+                close_old_connections()
+            else:
+                if entries or not options['watch']:
+                    self.stdout.write('Applied {} queued changes: {} indexed, {} removed, {} failed'.format(
+                        entries, indexed, removed, failed))
+            if not options['watch']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 18:10
+
+from django.core.management.base import CommandError
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import get_indexed_models
+from wagtail.search.management.commands import update_index
+
+from search.cache import invalidate_search_results
+
+
+class Command(update_index.Command):
+    """
+    wagtail's update_index with a --chunked mode for large sites: objects are
+    streamed in primary key order, `chunk_size` at a time, and written over
+    the live index instead of into an emptied one, so search keeps working
+    during the rebuild. Documents of deleted objects are pruned per model at
+    the end. Progress is checkpointed in the index after every chunk;
+    --resume continues an interrupted run from there.
+    """
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--chunked', action='store_true', default=False,
+            help='Rebuild in place in primary key order, checkpointing every chunk')
+        parser.add_argument(
+            '--resume', action='store_true', default=False,
+            help='With --chunked, continue from the last checkpoint of an interrupted run')
+
+    def handle(self, **options):
+        if options['resume'] and not options['chunked']:
+            raise CommandError('--resume only applies to --chunked rebuilds')
+        self.chunked = options['chunked']
+        self.resume = options['resume']
+        super().handle(**options)
+        if not self.chunked:
+            # With AUTO_UPDATE off nothing else drops the cached results
+            invalidate_search_results()
+
+    def update_backend(self, backend_name, schema_only=False, chunk_size=update_index.DEFAULT_CHUNK_SIZE):
+        if not self.chunked or schema_only:
+            return super().update_backend(backend_name, schema_only=schema_only, chunk_size=chunk_size)
+
+        chunk_size = int(chunk_size)
+        backend = get_search_backend(backend_name)
+        self.stdout.write('Updating backend in place: ' + backend_name)
+
+        object_count = 0
+        for index, models in update_index.group_models_by_index(backend, get_indexed_models()).items():
+            if not hasattr(index, 'set_checkpoint'):
+                raise CommandError("Index {} of backend '{}' cannot be rebuilt in chunks".format(index.name, backend_name))
+            if not self.resume:
+                index.clear_checkpoints()
+
+            for model in models:
+                self.stdout.write('{}: {} '.format(backend_name, model._meta.label).ljust(35), ending='')
+                object_count += self.update_model(index, model, chunk_size)
+                self.print_newline()
+
+            index.clear_checkpoints()
+            index.optimize()
+
+        invalidate_search_results()
+        self.stdout.write(backend_name + ': indexed %d objects' % object_count)
+        self.print_newline()
+
+    def update_model(self, index, model, chunk_size):
+        last, done = index.get_checkpoint(model._meta.label)
+        if done:
+            self.stdout.write('done', ending='')
+            return 0
+
+        object_count = 0
+        queryset = model.get_indexed_objects().order_by('pk')
+        for chunk in self.print_iter_progress(self.keyset_chunks(queryset, chunk_size, last)):
+            index.add_items(model, chunk)
+            index.set_checkpoint(model._meta.label, chunk[-1].pk)
+            object_count += len(chunk)
+
+        self.prune_model(index, model, chunk_size)
+        index.set_checkpoint(model._meta.label, None, done=True)
+        return object_count
+
+    def keyset_chunks(self, queryset, chunk_size, last=None):
+        """
+        Yield `queryset` (ordered by pk) as lists of at most `chunk_size`
+        objects, starting after primary key `last`. Every chunk is a seek on
+        the primary key, so memory and per-chunk cost stay flat however far
+        the rebuild has got.
+        """
+        pk_field = queryset.model._meta.pk
+        if last is not None:
+            last = pk_field.to_python(last)
+        while True:
+            chunk = list(queryset.filter(pk__gt=last)[:chunk_size] if last is not None else queryset[:chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last = chunk[-1].pk
+
+    def prune_model(self, index, model, chunk_size):
+        # Remove the documents whose object was deleted (or is no longer
+        # indexed) since it was written
+        pk_field = model._meta.pk
+        for object_ids in index.object_ids(model, chunk_size):
+            pks = {pk_field.to_python(object_id) for object_id in object_ids}
+            existing = set(model.get_indexed_objects().filter(pk__in=pks).values_list('pk', flat=True))
+            stale = [model(pk=pk) for pk in pks - existing]
+            if stale:
+                index.delete_items(stale)
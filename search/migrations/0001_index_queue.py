@@ -0,0 +1,29 @@
+# Generated by Django 2.2.1 on 2026-10-18 18:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexQueueEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.CharField(max_length=255, verbose_name='对象ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='加入时间')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType', verbose_name='内容类型')),
+            ],
+            options={
+                'verbose_name': '索引队列',
+                'verbose_name_plural': '索引队列',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 2.2.1 on 2026-10-18 22:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_index_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indexqueueentry',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='失败次数'),
+        ),
+        migrations.AddField(
+            model_name='indexqueueentry',
+            name='failed',
+            field=models.BooleanField(default=False, verbose_name='已放弃'),
+        ),
+    ]
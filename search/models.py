@@ -0,0 +1,26 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+
+class IndexQueueEntry(models.Model):
+    """
+    An object waiting to be reindexed (or removed from the index), written
+    by `search.signals` on publish, unpublish and delete and consumed in
+    batches by `search.queue.process_queue`. One row per event: the worker
+    only deletes the rows it has read, so an object changed again while a
+    batch is running is picked up by the next one. Rows whose object could
+    not be indexed stay queued; after YONION_SEARCH_INDEX_MAX_ATTEMPTS
+    failures they are marked `failed` and skipped.
+    """
+    content_type = models.ForeignKey(ContentType, verbose_name='内容类型', on_delete=models.CASCADE)
+    object_id = models.CharField('对象ID', max_length=255)
+    created_at = models.DateTimeField('加入时间', auto_now_add=True)
+    attempts = models.PositiveIntegerField('失败次数', default=0)
+    failed = models.BooleanField('已放弃', default=False)
+
+    class Meta:
+        verbose_name = '索引队列'
+        verbose_name_plural = verbose_name
+
+    def __str__(self):
+        return '{}:{}'.format(self.content_type_id, self.object_id)
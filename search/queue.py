@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 18:10
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from wagtail.core.models import Page
+from wagtail.search.backends import get_search_backends
+
+from search.cache import invalidate_search_results
+
+logger = logging.getLogger(__name__)
+
+
+def _content_type_id(obj):
+    # Pages are queued as their specific type, whichever class sent the signal
+    if isinstance(obj, Page):
+        return obj.content_type_id
+    return ContentType.objects.get_for_model(obj).pk
+
+
+def enqueue(obj):
+    from search.models import IndexQueueEntry
+
+    IndexQueueEntry.objects.create(content_type_id=_content_type_id(obj), object_id=str(obj.pk))
+
+
+def queue_length():
+    from search.models import IndexQueueEntry
+
+    return IndexQueueEntry.objects.count()
+
+
+def _apply_objects(model, object_ids):
+    pks = {model._meta.pk.to_python(object_id) for object_id in object_ids}
+    found = list(model.get_indexed_objects().filter(pk__in=pks))
+    missing = [model(pk=pk) for pk in pks - {obj.pk for obj in found}]
+
+    for backend in get_search_backends():
+        if found:
+            backend.add_bulk(model, found)
+        for obj in missing:
+            backend.delete(obj)
+    return len(found), len(missing)
+
+
+def _apply(model, object_ids):
+    """
+    Reindex the objects of `model` that still exist and remove the others
+    from every search backend. Returns (indexed, removed, failed object
+    ids): when the batch fails, the objects are applied one by one so a
+    single broken one does not hold back the others.
+    """
+    try:
+        indexed, removed = _apply_objects(model, object_ids)
+        return indexed, removed, set()
+    except Exception:
+        if len(object_ids) == 1:
+            logger.exception('Could not index %s %s', model._meta.label, next(iter(object_ids)))
+            return 0, 0, set(object_ids)
+
+    indexed = removed = 0
+    failed = set()
+    for object_id in object_ids:
+        try:
+            found, missing = _apply_objects(model, [object_id])
+        except Exception:
+            logger.exception('Could not index %s %s', model._meta.label, object_id)
+            failed.add(object_id)
+        else:
+            indexed += found
+            removed += missing
+    return indexed, removed, failed
+
+
+def _record_failures(entry_ids):
+    from search.models import IndexQueueEntry
+
+    entries = IndexQueueEntry.objects.filter(id__in=entry_ids)
+    entries.update(attempts=F('attempts') + 1)
+    given_up = entries.filter(attempts__gte=settings.YONION_SEARCH_INDEX_MAX_ATTEMPTS)
+    for entry_id, content_type_id, object_id in given_up.values_list('id', 'content_type_id', 'object_id'):
+        logger.error('Giving up indexing content type %s object %s (queue entry %s)', content_type_id, object_id, entry_id)
+    given_up.update(failed=True)
+
+
+def process_queue(batch_size=None, after=0):
+    """
+    Apply the oldest `batch_size` queued changes after entry id `after`,
+    each object once however often it was queued. Rows are deleted only
+    once their object went into the index; the rows of objects that failed
+    stay queued for the next run. Returns (entries, indexed, removed,
+    failed, id of the last entry read).
+    """
+    from search.models import IndexQueueEntry
+
+    batch_size = batch_size or settings.YONION_SEARCH_INDEX_BATCH_SIZE
+    entries = list(IndexQueueEntry.objects
+                   .filter(failed=False, id__gt=after)
+                   .order_by('id')
+                   .values_list('id', 'content_type_id', 'object_id')[:batch_size])
+    if not entries:
+        return 0, 0, 0, 0, after
+
+    object_ids = defaultdict(set)
+    for entry_id, content_type_id, object_id in entries:
+        object_ids[content_type_id].add(object_id)
+
+    indexed = removed = 0
+    failed = set()
+    for content_type_id, ids in object_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            # The model was removed from the code base; nothing left to index
+            continue
+        found, missing, failures = _apply(model, ids)
+        indexed += found
+        removed += missing
+        failed.update((content_type_id, object_id) for object_id in failures)
+
+    failed_ids = [entry[0] for entry in entries if (entry[1], entry[2]) in failed]
+    if failed_ids:
+        _record_failures(failed_ids)
+    IndexQueueEntry.objects.filter(id__in=[entry[0] for entry in entries if entry[0] not in failed_ids]).delete()
+    invalidate_search_results()
+    return len(entries), indexed, removed, len(failed_ids), entries[-1][0]
+
+
+def drain_queue(batch_size=None):
+    """
+    Process batches until the queue is empty, reading every entry once:
+    failed ones are retried by the next call. Returns the summed (entries,
+    indexed, removed, failed).
+    """
+    totals = [0, 0, 0, 0]
+    after = 0
+    while True:
+        entries, indexed, removed, failed, after = process_queue(batch_size, after)
+        if not entries:
+            return tuple(totals)
+        totals = [total + count for total, count in zip(totals, (entries, indexed, removed, failed))]
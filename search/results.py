@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 17:50
+
+from wagtail.core.models import Page
+from wagtail.search.backends import get_search_backend
+
+from home.gallery import prefetch_gallery_images
+from search.snippets import build_snippet
+
+
+def load_results(ids):
+    """
+    Load the pages `ids` as their specific types, in the given order: one
+    query per page type for the specific rows and one for their gallery
+    images, whatever the number of results. Renditions of the result images
+    are then resolved in one batch by `{% prefetch_renditions %}`.
+    """
+    if not ids:
+        return []
+
+    pages = Page.objects.filter(pk__in=ids).specific()
+    found = {page.pk: page for page in prefetch_gallery_images(pages)}
+    return [found[pk] for pk in ids if pk in found]
+
+
+def attach_snippets(pages, query_string):
+    """
+    Set `search_snippet` on each result: highlighted context cut from the
+    plain text stored in the search index, with one index read for the whole
+    page of results and no rendering of the page bodies.
+    """
+    texts = get_search_backend().index.texts(Page, [page.pk for page in pages])
+    for page in pages:
+        page.search_snippet = build_snippet(texts.get(str(page.pk), ''), query_string)
+    return pages
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 17:10
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from wagtail.core.models import Page
+from wagtail.core.signals import page_published, page_unpublished
+from wagtail.search import index
+
+from home.facets import faceted_models
+from search.queue import enqueue
+from search.suggest import page_changed
+
+# The search backends have AUTO_UPDATE off: changes are queued here and
+# applied in batches by `manage.py process_index_queue`, which also drops the
+# cached results once the index has them.
+
+
+def _auto_update(instance):
+    # Historical models saved by data migrations (wagtailcore's initial
+    # pages) are Indexed too, but run before the queue table exists
+    model = type(instance)
+    return (isinstance(instance, index.Indexed) and model.__module__ != '__fake__'
+            and getattr(model, 'search_auto_update', True))
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def enqueue_page_change(sender, instance, **kwargs):
+    if _auto_update(instance):
+        enqueue(instance)
+
+
+@receiver(post_save)
+def enqueue_object_change(sender, instance, **kwargs):
+    # Pages are queued on publish and unpublish only: saving a draft does not
+    # change what the index holds
+    if not isinstance(instance, Page) and _auto_update(instance):
+        enqueue(instance)
+
+
+@receiver(post_delete)
+def enqueue_object_delete(sender, instance, **kwargs):
+    if _auto_update(instance):
+        enqueue(instance)
+
+
+# Title suggestions: the processes update the changed pages from the journal
+def _connect_suggestions(model):
+    def suggestion_changed(sender, instance, **kwargs):
+        page_changed(instance)
+
+    for signal in (page_published, page_unpublished, post_delete):
+        signal.connect(suggestion_changed, sender=model, weak=False)
+
+
+for model in faceted_models():
+    _connect_suggestions(model)
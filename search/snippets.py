@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 18:40
+
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from search.tokenizer import TOKEN_RE, is_cjk, normalize
+
+SNIPPET_LENGTH = 120
+
+
+def highlight_terms(query_string):
+    # Whole query words first; long Chinese words also by their bigrams
+    terms = set()
+    for run in TOKEN_RE.findall(normalize(query_string)):
+        terms.add(run)
+        if is_cjk(run) and len(run) > 2:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return sorted(terms, key=len, reverse=True)
+
+
+def build_snippet(text, query_string, length=SNIPPET_LENGTH):
+    """
+    Cut `length` characters of the stored plain text around the first
+    match of the query and wrap every match in <em>. Returns safe HTML.
+    """
+    if not text:
+        return ''
+
+    terms = highlight_terms(query_string)
+    pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE) if terms else None
+    match = pattern.search(text) if pattern else None
+
+    start = max(0, match.start() - length // 3) if match else 0
+    fragment = text[start:start + length]
+
+    parts = ['…'] if start > 0 else []
+    position = 0
+    if pattern:
+        for match in pattern.finditer(fragment):
+            parts.append(escape(fragment[position:match.start()]))
+            parts.append('<em>{}</em>'.format(escape(match.group())))
+            position = match.end()
+    parts.append(escape(fragment[position:]))
+    if start + length < len(text):
+        parts.append('…')
+    return mark_safe(''.join(parts))
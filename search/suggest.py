@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 17:30
+
+import bisect
+import threading
+import time
+
+from django.db import connection, transaction
+
+from home.facets import faceted_models
+from home.generations import append_journal, get_generation, read_journal
+from search.tokenizer import is_cjk, normalize
+
+# Changed page ids are kept in the journal this long. A process rebuilds
+# its index in the background once it is older than that (which also picks
+# up moved pages) or further behind than MAX_CATCH_UP changes.
+JOURNAL_TIMEOUT = 24 * 60 * 60
+MAX_CATCH_UP = 1000
+
+
+def title_keys(title):
+    """
+    Keys a title is found under: the title itself, the rest of it from
+    every word after a space and, since Chinese has no spaces, from every
+    Chinese character and every word following one.
+    """
+    title = normalize(title)
+    keys = {title}
+    for i in range(1, len(title)):
+        char, previous = title[i], title[i - 1]
+        if char.isspace():
+            continue
+        if previous.isspace() or is_cjk(char) or (is_cjk(previous) and char.isalnum()):
+            keys.add(title[i:])
+    return keys
+
+
+class SuggestIndex(object):
+    """
+    In-memory prefix index over the titles of the live course, mentor,
+    trainee and news pages: a sorted array of (key, page id) searched with
+    bisect, see `title_keys`.
+
+    Built once per process (at startup, see `warm`). Published,
+    unpublished and deleted pages are appended to the 'suggest-changes'
+    journal and every process updates just those entries on its next
+    lookup; the array is replaced, never changed in place, so lookups need
+    no lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._journal = None
+        self._built_at = 0
+        self._rebuilding = False
+        # (keys, entries), swapped as one
+        self._index = ([], {})
+
+    def _load(self, pks=None):
+        # {page id: entry} of the live pages (among `pks`)
+        entries = {}
+        for model in faceted_models():
+            pages = model.objects.live().only('id', 'title', 'url_path')
+            if pks is not None:
+                pages = pages.filter(pk__in=pks)
+            for page in pages:
+                entries[page.pk] = {
+                    'title': page.title,
+                    'url': page.url,
+                    'type': model._meta.verbose_name,
+                }
+        return entries
+
+    def _build(self, journal):
+        # Read `journal` before the pages: later changes are applied on top
+        entries = self._load()
+        keys = sorted((key, pk) for pk, entry in entries.items() for key in title_keys(entry['title']))
+        with self._lock:
+            self._index, self._journal, self._built_at = (keys, entries), journal, time.time()
+
+    def _rebuild_in_background(self, journal):
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+
+        def rebuild():
+            try:
+                self._build(journal)
+            finally:
+                self._rebuilding = False
+                connection.close()
+
+        # Lookups keep using the current index meanwhile
+        threading.Thread(target=rebuild, name='suggest-index', daemon=True).start()
+
+    def _update(self, journal):
+        pks = read_journal('suggest-changes', self._journal, journal)
+        if pks is None:
+            # Lost changes: rebuild, and keep the current index meanwhile
+            self._journal = journal
+            self._rebuild_in_background(journal)
+            return
+        pks = set(pks)
+        changed = self._load(pks)
+        keys, entries = self._index
+        keys = [item for item in keys if item[1] not in pks]
+        for pk, entry in changed.items():
+            for key in title_keys(entry['title']):
+                bisect.insort(keys, (key, pk))
+        entries = {pk: entry for pk, entry in entries.items() if pk not in pks}
+        entries.update(changed)
+        self._index, self._journal = (keys, entries), journal
+
+    def _current(self):
+        journal = get_generation('suggest-changes')
+        if self._journal is None:
+            # Not built yet (or being built by `warm`): wait for it
+            with self._build_lock:
+                if self._journal is None:
+                    self._build(journal)
+        elif not 0 <= journal - self._journal <= MAX_CATCH_UP or time.time() - self._built_at > JOURNAL_TIMEOUT:
+            self._rebuild_in_background(journal)
+        elif journal != self._journal:
+            with self._lock:
+                if journal != self._journal:
+                    self._update(journal)
+        return self._index
+
+    def warm(self):
+        """
+        Build the index in the background, so that the first suggestion
+        request does not wait for it. Called by the WSGI application.
+        """
+        def build():
+            try:
+                self._current()
+            finally:
+                connection.close()
+
+        threading.Thread(target=build, name='suggest-index', daemon=True).start()
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize(prefix).strip()
+        if not prefix:
+            return []
+
+        keys, entries = self._current()
+        suggestions = []
+        seen = set()
+        for key, pk in keys[bisect.bisect_left(keys, (prefix,)):]:
+            if not key.startswith(prefix) or len(suggestions) >= limit:
+                break
+            if pk not in seen:
+                seen.add(pk)
+                suggestions.append(entries[pk])
+        return suggestions
+
+
+suggest_index = SuggestIndex()
+
+
+def page_changed(page):
+    # After the commit: a process reading the page back must see the change
+    pk = page.pk
+    transaction.on_commit(lambda: append_journal('suggest-changes', [pk], JOURNAL_TIMEOUT))
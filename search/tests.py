@@ -0,0 +1,331 @@
+import datetime
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.core.models import Page
+from wagtail.search.backends import get_search_backend
+from wagtail.search.models import Query
+
+from course.models import CoursePage
+from home.generations import append_journal, get_generation
+from news.models import NewsPage
+from search.backend import LocalSearchBackend
+from search.cache import cached_search, invalidate_search_results, local_results
+from search.hits import HitBuffer
+from search.models import IndexQueueEntry
+from search.queue import drain_queue, enqueue, queue_length
+from search.results import attach_snippets, load_results
+from search.snippets import build_snippet, highlight_terms
+from search.suggest import JOURNAL_TIMEOUT, SuggestIndex, title_keys
+from search.tokenizer import pinyin_tokens, plain_text, tokenize
+
+BODY = '[{"type": "段落", "value": "<p>课程内容</p>"}]'
+
+
+def create_course(title, category='workshop', tags=(), intro='课程简介'):
+    page = CoursePage(title=title, slug='course-{}'.format(CoursePage.objects.count()), date=datetime.date(2019, 5, 1),
+                      intro=intro, category=category, body=BODY)
+    page.tags.add(*tags)
+    Page.get_first_root_node().add_child(instance=page)
+    return page
+
+
+class TokenizerTests(SimpleTestCase):
+    def test_chinese_bigrams(self):
+        self.assertEqual(tokenize('瑜伽课程'), ['瑜伽', '伽课', '课程'])
+        self.assertEqual(tokenize('瑜'), ['瑜'])
+
+    def test_mixed_text(self):
+        self.assertEqual(tokenize('Hatha瑜伽 2019班'), ['hatha', '瑜伽', '2019', '班'])
+        # Full-width letters and digits, HTML and entities
+        self.assertEqual(tokenize('<p>ＲＹＴ２００ &amp; 阴瑜伽</p>'), ['ryt200', '阴瑜', '瑜伽'])
+        self.assertEqual(plain_text('<p>瑜伽&nbsp;课程</p>\n<p>简介</p>'), '瑜伽 课程 简介')
+
+
+    def test_pinyin_tokens(self):
+        self.assertEqual(pinyin_tokens('张小明'), ['zhangxiaoming', 'xiaoming', 'ming', 'zxm'])
+        self.assertEqual(pinyin_tokens('Li 李'), ['li'])
+        self.assertEqual(pinyin_tokens('Yoga'), [])
+
+class LocalSearchBackendTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.backend = LocalSearchBackend({'PATH': os.path.join(directory.name, 'index.sqlite3')})
+
+        self.hatha = create_course('哈他瑜伽初级班', category='faculty', tags=['初级'])
+        self.ashtanga = create_course('阿斯汤加进阶', tags=['进阶'], intro='阿斯汤加瑜伽')
+        self.pilates = create_course('普拉提塑形', tags=['初级'], intro='核心训练')
+        self.backend.index.add_items(CoursePage, [self.hatha, self.ashtanga, self.pilates])
+
+    def search(self, query, **kwargs):
+        return self.backend.search(query, CoursePage, **kwargs)
+
+    def test_chinese_query(self):
+        results = self.search('瑜伽')
+        self.assertEqual(set(results.pks()), {self.hatha.pk, self.ashtanga.pk})
+        # The title match ranks above the intro match
+        self.assertEqual(results[0].pk, self.hatha.pk)
+
+    def test_all_words_must_match(self):
+        self.assertEqual(list(self.search('阿斯汤加 进阶').pks()), [self.ashtanga.pk])
+        self.assertEqual(list(self.search('阿斯汤加 塑形').pks()), [])
+
+    def test_pinyin_query(self):
+        self.assertEqual(list(self.search('pulati').pks()), [self.pilates.pk])
+
+    def test_queryset_filters(self):
+        CoursePage.objects.filter(pk=self.hatha.pk).update(live=False)
+        self.assertEqual(list(self.backend.search('瑜伽', CoursePage.objects.live()).pks()), [self.ashtanga.pk])
+
+    def test_facets(self):
+        results = self.search('课程简介 核心训练 阿斯汤加', operator='or')
+        self.assertEqual(results.count(), 3)
+        self.assertEqual(results.facet('tag'), {'初级': 2, '进阶': 1})
+        self.assertEqual(results.facet('category'), {'workshop': 2, 'faculty': 1})
+
+        narrowed = results.filter_facets(tag='初级', category='workshop')
+        self.assertEqual(list(narrowed.pks()), [self.pilates.pk])
+
+    def test_update_and_delete(self):
+        self.pilates.title = '普拉提瑜伽'
+        self.backend.index.add_items(CoursePage, [self.pilates])
+        self.assertIn(self.pilates.pk, self.search('瑜伽').pks())
+
+        self.backend.index.delete_item(self.hatha)
+        self.assertEqual(list(self.search('初级班').pks()), [])
+        self.assertEqual(self.search('瑜伽').count(), 2)
+
+
+class HitBufferTests(TestCase):
+    @override_settings(YONION_SEARCH_HIT_FLUSH_SIZE=100, YONION_SEARCH_HIT_FLUSH_INTERVAL=3600)
+    def test_hits_are_written_on_flush(self):
+        hits = HitBuffer()
+        for query_string in ('瑜伽', '瑜伽 ', 'Yoga', '瑜伽'):
+            hits.record(query_string)
+        self.assertFalse(Query.objects.exists())
+
+        hits.flush()
+        self.assertEqual(Query.get('瑜伽').hits, 3)
+        self.assertEqual(Query.get('yoga').hits, 1)
+
+        hits.record('瑜伽')
+        hits.flush()
+        self.assertEqual(Query.get('瑜伽').hits, 4)
+
+    @override_settings(YONION_SEARCH_HIT_FLUSH_SIZE=2, YONION_SEARCH_HIT_FLUSH_INTERVAL=3600)
+    def test_flush_when_full(self):
+        hits = HitBuffer()
+        hits.record('瑜伽')
+        hits.record('普拉提')
+        self.assertEqual(Query.get('普拉提').hits, 1)
+
+
+def temporary_backend(test):
+    # The default search backend, over an empty index of its own
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    backends = override_settings(WAGTAILSEARCH_BACKENDS={'default': {
+        'BACKEND': 'search.backend', 'PATH': os.path.join(directory.name, 'index.sqlite3'), 'AUTO_UPDATE': False,
+    }})
+    backends.enable()
+    test.addCleanup(backends.disable)
+    return get_search_backend()
+
+
+class CachedSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_results.clear()
+        self.backend = temporary_backend(self)
+        self.hatha = create_course('哈他瑜伽初级班', category='faculty', tags=['初级'])
+        self.ashtanga = create_course('阿斯汤加进阶', tags=['进阶'], intro='阿斯汤加瑜伽')
+        self.backend.index.add_items(CoursePage, [self.hatha, self.ashtanga])
+
+    def test_results_and_facets(self):
+        results = cached_search('瑜伽')
+        self.assertEqual(results['ids'], [self.hatha.pk, self.ashtanga.pk])
+        self.assertEqual(results['facets']['type'], [('course.coursepage', 2)])
+        self.assertEqual(results['facets']['category'], [('faculty', 1), ('workshop', 1)])
+
+        self.assertEqual(cached_search('瑜伽', tag='进阶')['ids'], [self.ashtanga.pk])
+        self.assertEqual(cached_search('瑜伽', page_type='news.newspage')['ids'], [])
+
+    def test_normalised_queries_share_an_entry(self):
+        self.assertIs(cached_search(' 瑜伽 '), cached_search('瑜伽'))
+        local_results.clear()
+        # The shared cache serves the other processes
+        with mock.patch.object(Page.objects, 'live') as live:
+            self.assertEqual(cached_search('瑜伽')['ids'], [self.hatha.pk, self.ashtanga.pk])
+            live.assert_not_called()
+
+    def test_invalidation(self):
+        self.assertEqual(len(cached_search('瑜伽')['ids']), 2)
+        pilates = create_course('普拉提瑜伽')
+        self.backend.index.add_items(CoursePage, [pilates])
+        self.assertEqual(len(cached_search('瑜伽')['ids']), 2)
+
+        invalidate_search_results()
+        self.assertIn(pilates.pk, cached_search('瑜伽')['ids'])
+
+
+class LoadResultsTests(TestCase):
+    def setUp(self):
+        self.courses = [create_course('哈他瑜伽初级班'), create_course('阿斯汤加进阶')]
+        self.news = []
+        for title in ('开班通知', '结业典礼'):
+            news = NewsPage(title=title, slug='news-{}'.format(len(self.news)), date=datetime.date(2019, 5, 1),
+                            category='news', body=BODY)
+            Page.get_first_root_node().add_child(instance=news)
+            self.news.append(news)
+
+    def test_specific_pages_in_order(self):
+        ids = [self.news[0].pk, self.courses[1].pk, 0, self.courses[0].pk]
+        pages = load_results(ids)
+        self.assertEqual([page.pk for page in pages], [self.news[0].pk, self.courses[1].pk, self.courses[0].pk])
+        self.assertEqual([type(page) for page in pages], [NewsPage, CoursePage, CoursePage])
+        self.assertEqual(load_results([]), [])
+
+    def test_queries_per_type(self):
+        with CaptureQueriesContext(connection) as two:
+            load_results([self.news[0].pk, self.courses[0].pk])
+        with CaptureQueriesContext(connection) as four:
+            load_results([page.pk for page in self.news + self.courses])
+        self.assertEqual(len(four), len(two))
+
+
+class SnippetTests(TestCase):
+    def test_highlight_terms(self):
+        terms = highlight_terms('阴瑜伽 Yoga')
+        # Longest first, so a word wins over its own bigrams
+        self.assertEqual([len(term) for term in terms], [4, 3, 2, 2])
+        self.assertEqual(set(terms), {'阴瑜伽', '阴瑜', '瑜伽', 'yoga'})
+
+    def test_build_snippet(self):
+        self.assertEqual(build_snippet('阿斯汤加瑜伽 & YOGA', '瑜伽 yoga'),
+                         '阿斯汤加<em>瑜伽</em> &amp; <em>YOGA</em>')
+        text = '课程' * 50 + '瑜伽' + '课程' * 50
+        self.assertEqual(build_snippet(text, '瑜伽', length=30),
+                         '…' + '课程' * 5 + '<em>瑜伽</em>' + '课程' * 9 + '…')
+        self.assertEqual(build_snippet(text, '普拉提', length=10), '课程' * 5 + '…')
+        self.assertEqual(build_snippet('', '瑜伽'), '')
+
+    def test_attach_snippets_from_index(self):
+        backend = temporary_backend(self)
+        course = create_course('哈他瑜伽初级班', intro='适合零基础的瑜伽课程')
+        backend.index.add_items(CoursePage, [course])
+        attach_snippets([course], '瑜伽')
+        self.assertIn('零基础的<em>瑜伽</em>课程', course.search_snippet)
+
+
+class IndexQueueTests(TestCase):
+    def setUp(self):
+        self.backend = temporary_backend(self)
+        self.hatha = create_course('哈他瑜伽初级班')
+        self.pilates = create_course('普拉提瑜伽')
+
+    def indexed(self):
+        return set(Page.objects.live().search('瑜伽').pks())
+
+    def test_publish_is_queued_and_applied(self):
+        self.hatha.save()
+        self.assertFalse(IndexQueueEntry.objects.exists())
+
+        for _ in range(2):
+            self.hatha.save_revision().publish()
+        self.assertEqual(queue_length(), 2)
+
+        generation = get_generation('search')
+        self.assertEqual(drain_queue(), (2, 1, 0, 0))
+        self.assertEqual(queue_length(), 0)
+        self.assertEqual(self.indexed(), {self.hatha.pk})
+        self.assertGreater(get_generation('search'), generation)
+
+    def test_deleted_pages_are_removed(self):
+        self.backend.index.add_items(CoursePage, [self.hatha, self.pilates])
+        self.pilates.delete()
+        # Queued once per deleted table row, removed once
+        self.assertEqual(drain_queue()[1:], (0, 1, 0))
+        self.assertEqual(self.indexed(), {self.hatha.pk})
+
+    @override_settings(YONION_SEARCH_INDEX_MAX_ATTEMPTS=2)
+    def test_failures_are_isolated(self):
+        add_bulk = LocalSearchBackend.add_bulk
+
+        def broken_add_bulk(backend, model, objs):
+            if any(obj.pk == self.pilates.pk for obj in objs):
+                raise ValueError('broken page')
+            return add_bulk(backend, model, objs)
+
+        enqueue(self.hatha)
+        enqueue(self.pilates)
+        with mock.patch.object(LocalSearchBackend, 'add_bulk', broken_add_bulk), self.assertLogs('search.queue'):
+            self.assertEqual(drain_queue(), (2, 1, 0, 1))
+            self.assertEqual(self.indexed(), {self.hatha.pk})
+            entry = IndexQueueEntry.objects.get()
+            self.assertEqual((entry.object_id, entry.attempts, entry.failed), (str(self.pilates.pk), 1, False))
+
+            drain_queue()
+            entry.refresh_from_db()
+            self.assertEqual((entry.attempts, entry.failed), (2, True))
+            # Given up: no longer read
+            self.assertEqual(drain_queue(), (0, 0, 0, 0))
+
+        enqueue(self.pilates)
+        self.assertEqual(drain_queue(), (1, 1, 0, 0))
+        self.assertEqual(self.indexed(), {self.hatha.pk, self.pilates.pk})
+
+
+class SuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hatha = create_course('哈他瑜伽初级班')
+        create_course('阿斯汤加进阶')
+        self.index = SuggestIndex()
+
+    def titles(self, prefix):
+        return [entry['title'] for entry in self.index.suggest(prefix)]
+
+    def changed(self, page):
+        # What page_changed() writes once the transaction commits
+        append_journal('suggest-changes', [page.pk], JOURNAL_TIMEOUT)
+
+    def test_title_keys(self):
+        self.assertEqual(title_keys('Hatha Yoga'), {'hatha yoga', 'yoga'})
+        self.assertIn('瑜伽 2019班', title_keys('哈他瑜伽 2019班'))
+        self.assertIn('2019班', title_keys('瑜伽2019班'))
+
+    def test_prefix_inside_chinese_title(self):
+        self.assertEqual(self.titles('瑜伽'), ['哈他瑜伽初级班'])
+        self.assertEqual(self.titles('阿斯'), ['阿斯汤加进阶'])
+        self.assertEqual(self.titles('普拉提'), [])
+
+    def test_changed_pages_are_updated_without_rebuild(self):
+        self.titles('瑜伽')
+        with mock.patch.object(self.index, '_rebuild_in_background') as rebuild:
+            pilates = create_course('普拉提塑形')
+            self.changed(pilates)
+            self.hatha.title = '哈他初级班'
+            self.hatha.save()
+            self.changed(self.hatha)
+
+            self.assertEqual(self.titles('塑形'), ['普拉提塑形'])
+            self.assertEqual(self.titles('瑜伽'), [])
+            rebuild.assert_not_called()
+
+    def test_lost_journal_rebuilds(self):
+        self.titles('瑜伽')
+        with mock.patch.object(self.index, '_rebuild_in_background') as rebuild:
+            self.changed(create_course('普拉提塑形'))
+            cache.delete('suggest-changes:{}'.format(get_generation('suggest-changes')))
+            # The current index answers until the rebuild is done
+            self.assertEqual(self.titles('塑形'), [])
+            rebuild.assert_called_once_with(get_generation('suggest-changes'))
+
+        self.index._build(get_generation('suggest-changes'))
+        self.assertEqual(self.titles('塑形'), ['普拉提塑形'])
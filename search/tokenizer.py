@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Author：Qiujie Yao
+# Email: yaoqiujie@gscopetech.com
+# @Time: 2026-10-18 16:20
+
+import html
+import re
+import unicodedata
+
+from django.utils.html import strip_tags
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pinyin matching is optional
+    lazy_pinyin = None
+
+# Longer runs of Chinese text only get whole-run pinyin forms
+PINYIN_SUFFIX_MAX_LENGTH = 6
+
+# CJK Unified Ideographs (+ extension A and compatibility ideographs)
+CJK_CHARS = '㐀-䶿一-鿿豈-﫿'
+
+CJK_RUN_RE = re.compile(r'[{}]+'.format(CJK_CHARS))
+TOKEN_RE = re.compile(r'[{0}]+|[^\W_{0}]+'.format(CJK_CHARS))
+
+
+def normalize(text):
+    # Full-width letters/digits to ASCII, case folded
+    return unicodedata.normalize('NFKC', text).lower()
+
+
+def is_cjk(token):
+    return bool(CJK_RUN_RE.match(token))
+
+
+def plain_text(text):
+    # Rich text / StreamField HTML to one line of readable text
+    return ' '.join(html.unescape(strip_tags(text)).split())
+
+
+def tokenize(text):
+    """
+    Split `text` (plain or HTML) into index terms: latin words and numbers
+    as whole words, runs of Chinese characters as overlapping bigrams
+    ("瑜伽课程" -> "瑜伽", "伽课", "课程"). A lone Chinese character is kept
+    as a single-character term.
+    """
+    if not text:
+        return []
+
+    tokens = []
+    for run in TOKEN_RE.findall(normalize(html.unescape(strip_tags(text)))):
+        if is_cjk(run) and len(run) > 1:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def pinyin_tokens(text):
+    """
+    Pinyin forms of the Chinese runs in `text`, for names and titles:
+    "张小明" -> "zhangxiaoming", "xiaoming", "ming" and the initials "zxm".
+    Returns nothing when pypinyin is not installed.
+    """
+    if not text or lazy_pinyin is None:
+        return []
+
+    tokens = []
+    for run in CJK_RUN_RE.findall(normalize(html.unescape(strip_tags(text)))):
+        syllables = lazy_pinyin(run, errors='ignore')
+        if not syllables:
+            continue
+        tokens.append(''.join(syllables))
+        if len(syllables) <= PINYIN_SUFFIX_MAX_LENGTH:
+            tokens.extend(''.join(syllables[i:]) for i in range(1, len(syllables)))
+        if len(syllables) > 1:
+            tokens.append(''.join(lazy_pinyin(run, style=Style.FIRST_LETTER, errors='ignore')))
+    return tokens
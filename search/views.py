@@ -1,24 +1,66 @@
+from django.apps import apps
 from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.utils.http import urlencode
 
-from wagtail.core.models import Page
-from wagtail.search.models import Query
-from wagtail.images.models import Image
+from home.facets import category_label
+from home.wallpapers import get_wallpaper
+from search.cache import SEARCH_PAGE_TYPES, cached_search
+from search.hits import record_hit
+from search.results import attach_snippets, load_results
+from search.suggest import suggest_index
+
+FACET_TITLES = (
+    ('type', '类型'),
+    ('category', '类别'),
+    ('tag', '标签'),
+)
+
+
+def _search_facets(search_query, facets, filters):
+    # (value, count) pairs from the search cache -> template rows with labels
+    # and the query string that toggles the value
+    models = [apps.get_model(label) for label in SEARCH_PAGE_TYPES]
+    groups = []
+    for name, title in FACET_TITLES:
+        rows = []
+        for value, count in facets[name]:
+            if name == 'type':
+                label = apps.get_model(value)._meta.verbose_name
+            elif name == 'category':
+                label = category_label(models, value)
+            else:
+                label = value
+            active = filters.get(name) == value
+            toggled = dict(filters, **{name: None if active else value})
+            params = dict({'query': search_query}, **{key: val for key, val in toggled.items() if val})
+            rows.append({'label': label, 'count': count, 'active': active, 'params': urlencode(params)})
+        groups.append((title, rows))
+    return groups
 
 
 def search(request):
     search_query = request.GET.get('query', None)
     page = request.GET.get('page', 1)
 
+    # Filters: page type ('course.coursepage'), category and tag
+    filters = {name: request.GET.get(name, '').strip() or None for name in ('type', 'category', 'tag')}
+    if filters['type'] not in SEARCH_PAGE_TYPES:
+        filters['type'] = None
+
     # Search
+    facets = []
     if search_query:
-        search_results = Page.objects.live().search(search_query)
-        query = Query.get(search_query)
+        found = cached_search(search_query, page_type=filters['type'],
+                              category=filters['category'], tag=filters['tag'])
+        search_results = found['ids']
+        facets = _search_facets(search_query, found['facets'], filters)
 
-        # Record hit
-        query.add_hit()
+        # Record hit (buffered, see search.hits)
+        record_hit(search_query)
     else:
-        search_results = Page.objects.none()
+        search_results = []
 
     # Pagination
     paginator = Paginator(search_results, 10)
@@ -29,9 +71,30 @@ def search(request):
     except EmptyPage:
         search_results = paginator.page(paginator.num_pages)
 
-    wallpaper = Image.objects.filter(tags__name="搜索壁纸").order_by('-created_at')[0]
+    # Load only the pages shown, as their specific types, in result order
+    search_results.object_list = load_results(search_results.object_list)
+    if search_query:
+        attach_snippets(search_results.object_list, search_query)
+
+    wallpaper = get_wallpaper("搜索壁纸")
     return render(request, 'search/search.html', {
         'search_query': search_query,
         'search_results': search_results,
+        'search_facets': facets,
+        'filter_query': urlencode({name: value for name, value in filters.items() if value}),
         'wallpaper': wallpaper,
     })
+
+
+def suggest(request):
+    # As-you-type title completions for the search box
+    query = request.GET.get('query', '')
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 20)
+    except ValueError:
+        limit = 10
+
+    return JsonResponse({
+        'query': query,
+        'suggestions': suggest_index.suggest(query, limit),
+    })
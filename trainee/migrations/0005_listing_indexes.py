@@ -0,0 +1,25 @@
+# Generated by Django 2.2.1 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trainee', '0004_auto_20190530_1429'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='traineepage',
+            index=models.Index(fields=['category'], name='trainee_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traineepagetag',
+            index=models.Index(fields=['tag', 'content_object'], name='trainee_tag_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traineepagetag',
+            index=models.Index(fields=['content_object', 'tag'], name='trainee_object_tag_idx'),
+        ),
+    ]
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 
 from django.db import models
-from django.core.paginator import PageNotAnInteger, EmptyPage, Paginator
 from modelcluster.fields import ParentalKey
 from modelcluster.contrib.taggit import ClusterTaggableManager
 from taggit.models import TaggedItemBase
@@ -15,6 +14,10 @@ from wagtail.images.blocks import ImageChooserBlock
 from wagtail.documents.models import Document
 from wagtail.documents.edit_handlers import DocumentChooserPanel
 from wagtail.images.models import Image
+from home.gallery import first_gallery_item
+from home.listing import paginate_listing
+from home.recommendations import get_recommendations
+from home.wallpapers import get_wallpaper
 from wagtail.search import index
 from course.models import CoursePage
 
@@ -34,18 +37,9 @@ class TraineeIndexPage(Page):
     def get_context(self, request):
         # Update context to include only published posts, ordered by reverse-chron
         context = super().get_context(request)
-        traineepages = self.get_children().live().order_by('-first_published_at')
-        wallpaper = Image.objects.filter(tags__name="学员壁纸").order_by('-created_at')[0]
-        paginator = Paginator(traineepages, 3) # Show 3 resources per page
-        page = request.GET.get('page')
-        try:
-            traineepages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            traineepages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            traineepages = paginator.page(paginator.num_pages)
+        traineepages = self.get_children().live().specific().order_by('-first_published_at')
+        wallpaper = get_wallpaper("学员壁纸")
+        traineepages = paginate_listing(request, traineepages, 3) # Show 3 resources per page
 
         # make the variable 'resources' available on the template
         context['traineepages'] = traineepages
@@ -60,6 +54,13 @@ class TraineePageTag(TaggedItemBase):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        # ?tag= listings resolve the tag first, keyset scans probe per page
+        indexes = [
+            models.Index(fields=['tag', 'content_object'], name='trainee_tag_object_idx'),
+            models.Index(fields=['content_object', 'tag'], name='trainee_object_tag_idx'),
+        ]
+
 
 class TraineeTagIndexPage(Page):
     class Meta:
@@ -79,19 +80,10 @@ class TraineeTagIndexPage(Page):
         if cate and cate != '':
             traineepages = traineepages.filter(category=cate).order_by('-first_published_at')
 
-        # Workshop
-        umaylike = CoursePage.objects.filter(category='workshop')[:6]
-        wallpaper = Image.objects.filter(tags__name="学员壁纸").order_by('-created_at')[0]
-        paginator = Paginator(traineepages, 9) # Show 9 resources per page
-        page = request.GET.get('page')
-        try:
-            traineepages = paginator.page(page)
-        except PageNotAnInteger:
-            # If page is not an integer, deliver first page.
-            traineepages = paginator.page(1)
-        except EmptyPage:
-            # If page is out of range (e.g. 9999), deliver last page of results.
-            traineepages = paginator.page(paginator.num_pages)
+        wallpaper = get_wallpaper("学员壁纸")
+        traineepages = paginate_listing(request, traineepages, 9) # Show 9 resources per page
+        # Workshop courses related to the pages on screen
+        umaylike = get_recommendations(traineepages)
 
         # Update template context
         context = super().get_context(request)
@@ -125,9 +117,12 @@ class TraineePage(Page):
     class Meta:
         verbose_name = '学员详情页'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['category'], name='trainee_category_idx'),
+        ]
 
     def thumbnail_image(self):
-        gallery_item = self.gallery_images.first()
+        gallery_item = first_gallery_item(self)
         if gallery_item:
             return gallery_item.image
         else:
@@ -164,7 +159,7 @@ class TraineePage(Page):
     ]
 
     def get_context(self, request):
-        wallpaper = Image.objects.filter(tags__name="学员壁纸").order_by('-created_at')[0]
+        wallpaper = get_wallpaper("学员壁纸")
         # Update template context
         context = super().get_context(request)
         context['wallpaper'] = wallpaper